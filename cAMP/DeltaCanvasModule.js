@@ -0,0 +1,158 @@
+// Client side of deltaviz.DeltaCanvasGrid: keeps the last field and agent rasters,
+// applies full and delta frames to them and repaints only the cells that changed.
+
+// Decode an encoded raster (list or base64 zlib bytes) into an Int8Array
+var decodeRaster = function(raster) {
+	if (raster.encoding === "zlib") {
+		var bytes = Uint8Array.from(atob(raster.data), function(c) { return c.charCodeAt(0); });
+		var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("deflate"));
+		return new Response(stream).arrayBuffer().then(function(buffer) { return new Int8Array(buffer); });
+	}
+
+	return Promise.resolve(Int8Array.from(raster.data));
+};
+
+// State of the canvas: the rasters of the last applied frame
+var DeltaFrameState = function() {
+	this.reset = function() {
+		this.frame = -1;
+		this.width = 0;
+		this.height = 0;
+		this.palette = [];
+		this.shades = [];
+		this.field = null;
+		this.agents = null;
+		this.dataVis = [];
+	};
+
+	// Apply one encoded raster (full or delta) to a raster, returns the changed cells (null for all)
+	var applyRaster = function(state, name, encoded) {
+		if (encoded.encoding === "delta") {
+			var raster = state[name];
+			for (var i = 0; i < encoded.cells.length; i++)
+				raster[encoded.cells[i]] = encoded.values[i];
+			return Promise.resolve(encoded.cells);
+		}
+
+		return decodeRaster(encoded).then(function(raster) {
+			state[name] = raster;
+			return null;
+		});
+	};
+
+	// Apply a frame, resolves to the changed cells (null when every cell must be repainted, false when skipped)
+	this.apply = function(frame) {
+		// A delta frame only applies on top of the frame right before it, otherwise wait for a full frame
+		if (!frame.full && (this.field === null || frame.frame !== this.frame + 1))
+			return Promise.resolve(false);
+
+		var state = this;
+		if (frame.full) {
+			this.width = frame.width;
+			this.height = frame.height;
+			this.palette = frame.palette;
+			this.shades = frame.shades;
+		}
+		if (frame.dataVis !== undefined)
+			this.dataVis = frame.dataVis;
+		this.frame = frame.frame;
+
+		return Promise.all([applyRaster(this, "field", frame.field), applyRaster(this, "agents", frame.agents)])
+			.then(function(changed) {
+				if (frame.full || changed[0] === null || changed[1] === null)
+					return null;
+				return changed[0].concat(changed[1]);
+			});
+	};
+
+	this.reset();
+};
+
+var DeltaCanvasModule = function(canvas_width, canvas_height, grid_width, grid_height) {
+	// Create the element
+	// ------------------
+
+	var canvas_tag = `<canvas width="${canvas_width}" height="${canvas_height}" class="world-grid"/>`;
+	var parent_div_tag = '<div style="height:' + canvas_height + 'px;" class="world-grid-parent"></div>';
+
+	var canvas = $(canvas_tag)[0];
+	var parent = $(parent_div_tag)[0];
+	$("#elements").append(parent);
+	parent.append(canvas);
+
+	var context = canvas.getContext("2d");
+	var cellWidth = Math.floor(canvas_width / grid_width);
+	var cellHeight = Math.floor(canvas_height / grid_height);
+	var radius = 0.65 * (Math.min(cellWidth, cellHeight) / 2 - 1);
+
+	var state = new DeltaFrameState();
+	// Frames are applied one after another (decompressing a raster is asynchronous)
+	var queue = Promise.resolve();
+
+	// Paint one cell (flat index x * height + y): its gray, then the top agent if any
+	var drawCell = function(cell) {
+		var x = Math.floor(cell / state.height);
+		// html5 canvas y runs from top to bottom
+		var y = state.height - cell % state.height - 1;
+
+		context.fillStyle = state.palette[state.field[cell]];
+		context.fillRect(x * cellWidth, y * cellHeight, cellWidth, cellHeight);
+
+		var agent = state.agents[cell];
+		if (agent > 0) {
+			context.beginPath();
+			context.arc((x + 0.5) * cellWidth, (y + 0.5) * cellHeight, radius, 0, Math.PI * 2, false);
+			context.closePath();
+			context.fillStyle = state.shades[agent - 1];
+			context.fill();
+		}
+	};
+
+	// Paint the DataVis and NumDataVis cells (always on top)
+	var drawDataVis = function() {
+		for (var i = 0; i < state.dataVis.length; i++) {
+			var vis = state.dataVis[i];
+			var x = vis[0];
+			var y = state.height - vis[1] - 1;
+			var w = vis[3] === null ? 1 : 1.5;
+
+			context.fillStyle = vis[2];
+			context.fillRect((x + 0.5 - w / 2) * cellWidth, y * cellHeight, w * cellWidth, cellHeight);
+			if (vis[3] !== null) {
+				context.fillStyle = "#000000";
+				context.textAlign = "center";
+				context.textBaseline = "middle";
+				context.fillText(vis[3], (x + 0.5) * cellWidth, (y + 0.5) * cellHeight);
+			}
+		}
+	};
+
+	this.render = function(data) {
+		queue = queue.then(function() {
+			return state.apply(data);
+		}).then(function(changed) {
+			if (changed === false)
+				return;
+
+			if (changed === null) {
+				context.clearRect(0, 0, canvas_width, canvas_height);
+				for (var cell = 0; cell < state.field.length; cell++)
+					drawCell(cell);
+			} else {
+				for (var i = 0; i < changed.length; i++)
+					drawCell(changed[i]);
+			}
+			drawDataVis();
+		});
+	};
+
+	this.reset = function() {
+		queue = queue.then(function() {
+			state.reset();
+			context.clearRect(0, 0, canvas_width, canvas_height);
+		});
+	};
+};
+
+if (typeof module !== "undefined")
+	module.exports = {decodeRaster: decodeRaster, DeltaFrameState: DeltaFrameState};
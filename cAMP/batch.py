@@ -0,0 +1,142 @@
+import argparse
+
+import numpy as np
+
+from model import SlimeModel
+from checkpoint import loadCheckpoint
+from imaging import FrameExporter
+
+'''
+    Headless entry point: builds a SlimeModel without any portrayal work
+        (no cAMP/SlimeAgent views, columnar datacollector), runs it for a
+        number of steps and writes the collected data to disk.
+
+    Example:
+        python batch.py --steps 1000 --numAgents 2 --gDense .3 --out run.npz
+
+    Printing the number of agents, total cAMP and number of clusters every 100 steps:
+        python batch.py --steps 1000 --report 100
+
+    Exporting the field every 10 steps as PNG frames:
+        python batch.py --steps 1000 --export frames --exportInterval 10
+
+    Resuming an interrupted run from its last checkpoint:
+        python batch.py --steps 1000 --checkpoint run.ckpt.npz --out run.npz
+        python batch.py --steps 1000 --resume run.ckpt.npz --out run.npz
+'''
+
+# Default model parameters (same as the server's defaults)
+defaultParams = {
+    "height": 15,
+    "width": 15,
+    "color": "Blue",
+    "numAgents": 1,
+    "gDense": .5,
+    "kRate": 1.0,
+    "dcDiffu": .001,
+    "dhRes": .01,
+    "dtRes": .01,
+    "secRate": 1.0
+}
+
+# Build a headless SlimeModel from the default parameters updated with params
+def buildModel(**params):
+    modelParams = dict(defaultParams)
+    modelParams.update(params)
+
+    return SlimeModel(views=False, arrayCollector=True, **modelParams)
+
+# Print the number of agents, the total amount of cAMP and the number of clusters of a step event
+def printReport(event):
+    clusters = 0 if event["clusters"] is None else event["clusters"].getCount()
+    print("step %d: %d agents, %.3f cAMP, %d clusters" % (event.step, len(event["agents"]["x"]),
+                                                          event["totals"]["total"], clusters))
+
+# Run a headless model until it reaches a number of steps, optionally saving results to outPath, images of the
+#   field to an imaging.FrameExporter and a report every report steps (a model resumed from a checkpoint only runs
+#   the steps that are left)
+def runModel(steps, outPath=None, seed=None, resume=None, exporter=None, report=0, **params):
+    if resume is not None:
+        model = loadCheckpoint(resume)
+    else:
+        model = buildModel(seed=seed, **params)
+
+    fresh = model.schedule.steps == 0
+    if exporter is not None:
+        exporter.subscribe(model, current=fresh)
+    if report > 0:
+        model.observers.subscribe(printReport, ("agents", "clusters", "totals"), report, current=fresh)
+
+    for i in range(model.schedule.steps, steps):
+        model.step()
+    # Stop tile workers, if any
+    model.close()
+    if exporter is not None:
+        exporter.close()
+
+    if model.params["profile"]:
+        print(model.profiler.report())
+
+    if outPath is not None:
+        saveResults(model, outPath)
+
+    return model
+
+# Save the collected data of a model (.csv for a table, anything else as .npz arrays)
+def saveResults(model, outPath):
+    collector = model.datacollector
+    if outPath.endswith(".csv"):
+        data = collector.get_model_vars_dataframe()
+        data.insert(0, "Step", collector.getSteps())
+        data.to_csv(outPath, index=False)
+    else:
+        np.savez_compressed(outPath,
+                            steps=collector.getSteps(),
+                            totals=collector.getTotals(),
+                            clusters=collector.getClusters(),
+                            colAmts=collector.getColAmts(),
+                            rowAmts=collector.getRowAmts(),
+                            field=model.field.amounts)
+
+# Parse command line arguments (one option per model parameter)
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description="Run the Keller-Segel Slime Mold Aggregation Model without a server")
+    parser.add_argument("--steps", type=int, default=100, help="number of steps to run")
+    parser.add_argument("--out", default="results.npz", help="output file (.npz or .csv)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the random draws")
+    parser.add_argument("--compiled", action="store_true", help="use the Numba kernels (if installed)")
+    parser.add_argument("--tiles", type=int, default=1, help="number of tiles stepped by parallel worker processes")
+    parser.add_argument("--trajectory", default=None, help="directory to record the field and occupancy to")
+    parser.add_argument("--trajectoryInterval", type=int, default=1, help="record every this many steps")
+    parser.add_argument("--profile", action="store_true", help="time the step phases and print a report at the end")
+    parser.add_argument("--checkpoint", default=None, help="file to save a checkpoint to")
+    parser.add_argument("--checkpointInterval", type=int, default=1000, help="save a checkpoint every this many steps")
+    parser.add_argument("--resume", default=None, help="checkpoint to resume the run from (model options are ignored)")
+    parser.add_argument("--report", type=int, default=0, help="print agents, total cAMP and clusters every this many steps")
+    parser.add_argument("--export", default=None, help="directory of PNG frames, or animation file (.png/.apng, .gif/.mp4 with imageio)")
+    parser.add_argument("--exportInterval", type=int, default=1, help="export the field every this many steps")
+    parser.add_argument("--exportScale", type=int, default=4, help="pixels per cell of exported images")
+    parser.add_argument("--exportBlock", type=int, default=1, help="side of the blocks of cells drawn as one cell in exported images")
+    for name, value in defaultParams.items():
+        parser.add_argument("--" + name, type=type(value), default=value)
+
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+    args = vars(parseArgs())
+    steps = args.pop("steps")
+    outPath = args.pop("out")
+    seed = args.pop("seed")
+    resume = args.pop("resume")
+    report = args.pop("report")
+
+    exporter = None
+    export = args.pop("export")
+    exportInterval = args.pop("exportInterval")
+    exportScale = args.pop("exportScale")
+    exportBlock = args.pop("exportBlock")
+    if export is not None:
+        exporter = FrameExporter(export, exportInterval, exportScale, args["color"], exportBlock)
+
+    runModel(steps, outPath, seed, resume, exporter, report, **args)
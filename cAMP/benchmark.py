@@ -0,0 +1,193 @@
+import argparse
+import contextlib
+import io
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # Peak memory is not reported where the resource module is missing (Windows)
+    resource = None
+
+'''
+    Benchmark suite: steps SlimeModel headless over a matrix of grid sizes,
+        densities (gDense) and agents per tile (numAgents), for the cAMP model
+        and the experimental variant, and reports steps per second, peak
+        memory and time per phase of every case. Every case runs in a fresh
+        process (so peak memory and imports are its own), after a few warmup
+        steps that are not timed. Peak memory is the growth of the peak
+        resident memory from after the imports to the last step, so it counts
+        the model and its steps but not the interpreter, the libraries or the
+        model the experimental variant builds on import. Results are written
+        to a table and can be compared against the table of a previous run.
+
+    Example:
+        python benchmark.py --sizes 15 50 --gDense .3 .5 --numAgents 1 2 --out bench.csv
+        python benchmark.py --sizes 15 50 --gDense .3 .5 --numAgents 1 2 --compare bench.csv
+'''
+
+# Directory of every model variant
+variants = {"cAMP": os.path.dirname(os.path.abspath(__file__)),
+            "experimental": os.path.join(os.path.dirname(os.path.abspath(__file__)), "experimental")}
+
+# Columns identifying a case (used to match cases against a previous run)
+caseColumns = ["variant", "size", "gDense", "numAgents", "compiled", "views"]
+
+# Reset the peak resident memory of this process to its current resident memory (Linux only)
+def resetPeakMemory():
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+# Peak resident memory of this process in MB (since the last reset on Linux), None where it cannot be read
+def getPeakMemory():
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+
+    # Kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# Build and step one case in the current process, returns a row of the results table
+def runCase(variant, size, gDense, numAgents, steps, warmup, seed, compiled, views, params):
+    row = {"variant": variant, "size": size, "gDense": gDense, "numAgents": numAgents,
+           "compiled": compiled, "views": views, "steps": steps}
+    baseline = None
+
+    try:
+        # Import the model of the variant (every case runs in a fresh process). Importing the experimental variant
+        #   builds a ModularServer and a SlimeModel, whose output is discarded
+        sys.path.insert(0, variants[variant])
+        with contextlib.redirect_stdout(io.StringIO()):
+            import model as module
+        from profiling import StepProfiler
+
+        # Memory is measured from here, so the interpreter, the imports and the experimental import side effect
+        #   are excluded (the peak is reset where possible, so earlier peaks do not hide the case)
+        resetPeakMemory()
+        baseline = getPeakMemory()
+
+        params = dict(params, gDense=gDense, numAgents=numAgents)
+        if variant == "cAMP":
+            params.update(height=size, width=size)
+            model = module.SlimeModel(views=views, arrayCollector=not views, compiled=compiled, seed=seed,
+                                      profile=True, **params)
+        else:
+            import random
+            random.seed(seed)
+            # The experimental variant only takes its grid size from module globals (keeping its DataVis columns)
+            module.masterWidth = size + module.masterWidth - module.masterHeight
+            module.masterHeight = size
+            with contextlib.redirect_stdout(io.StringIO()):
+                model = module.SlimeModel(**params)
+
+        for i in range(warmup):
+            model.step()
+        if variant == "cAMP":
+            # Only time the measured steps
+            model.profiler = StepProfiler()
+
+        start = time.perf_counter()
+        for i in range(steps):
+            model.step()
+        seconds = time.perf_counter() - start
+
+        row.update({"width": model.width, "height": model.height, "agents": model.j, "seconds": seconds,
+                    "stepsPerSec": steps / seconds})
+        if variant == "cAMP":
+            for (name, total) in model.profiler.getTotals().items():
+                row["phase: " + name] = total / steps * 1000
+            model.close()
+        else:
+            row["phase: step"] = seconds / steps * 1000
+    except Exception as error:
+        row["error"] = type(error).__name__ + ": " + str(error)
+
+    if baseline is not None:
+        # Growth of the peak resident memory while the case was built and stepped
+        row["peakMemoryMB"] = getPeakMemory() - baseline
+
+    return row
+
+# Helper so pool workers can call runCase with a single argument
+def runCaseArgs(args):
+    return runCase(*args)
+
+# Run every combination of variants, sizes, gDense and numAgents, one fresh process per case
+def runBenchmark(variantNames=("cAMP", "experimental"), sizes=(15, 50), densities=(.3,), agentCounts=(1,),
+                 steps=20, warmup=2, seed=0, compiled=False, views=False):
+    # Parameters other than grid size, density and agents per tile
+    from batch import defaultParams
+    params = {name: value for (name, value) in defaultParams.items() if name not in ("gDense", "numAgents")}
+
+    cases = [(variant, size, gDense, numAgents, steps, warmup, seed, compiled, views, params)
+             for (variant, size, gDense, numAgents) in itertools.product(variantNames, sizes, densities, agentCounts)]
+
+    # Spawned processes so every case imports its own variant
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        rows = pool.map(runCaseArgs, cases, chunksize=1)
+
+    return pd.DataFrame(rows)
+
+# Match results against a previous run, change is the relative change in steps per second
+def compareResults(results, previous):
+    merged = results.merge(previous[caseColumns + ["stepsPerSec"]], on=caseColumns, how="left",
+                           suffixes=("", "Previous"))
+    merged["change"] = merged["stepsPerSec"] / merged["stepsPerSecPrevious"] - 1
+
+    return merged
+
+# Parse command line arguments
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Keller-Segel Slime Mold Aggregation Model")
+    parser.add_argument("--variants", nargs="+", default=list(variants), choices=list(variants), help="model variants to run")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 50], help="grid sizes (height and width)")
+    parser.add_argument("--gDense", type=float, nargs="+", default=[.3], help="densities of agents on the grid")
+    parser.add_argument("--numAgents", type=int, nargs="+", default=[1], help="agents per tile")
+    parser.add_argument("--steps", type=int, default=20, help="number of timed steps of every case")
+    parser.add_argument("--warmup", type=int, default=2, help="number of untimed steps before timing")
+    parser.add_argument("--seed", type=int, default=0, help="seed of every case")
+    parser.add_argument("--compiled", action="store_true", help="use the Numba kernels (if installed)")
+    parser.add_argument("--views", action="store_true", help="place cAMP and SlimeAgent views on the grid")
+    parser.add_argument("--out", default="benchmark.csv", help="output table (.csv)")
+    parser.add_argument("--compare", default=None, help="table of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=.1, help="slowdown reported as a regression")
+
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+    args = parseArgs()
+    results = runBenchmark(args.variants, args.sizes, args.gDense, args.numAgents, args.steps, args.warmup,
+                           args.seed, args.compiled, args.views)
+
+    columns = [name for name in caseColumns + ["agents", "stepsPerSec", "peakMemoryMB", "error"] if name in results]
+    if args.compare is not None:
+        results = compareResults(results, pd.read_csv(args.compare))
+        columns += ["stepsPerSecPrevious", "change"]
+
+    with pd.option_context("display.max_columns", None, "display.width", 200):
+        print(results[columns].to_string(index=False))
+
+    if args.compare is not None:
+        regressions = results[results["change"] < -args.tolerance]
+        if len(regressions) > 0:
+            print(str(len(regressions)) + " case(s) slower than " + args.compare + " by more than " + str(args.tolerance * 100) + "%")
+
+    results.to_csv(args.out, index=False)
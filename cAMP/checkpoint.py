@@ -0,0 +1,85 @@
+import json
+import os
+
+import numpy as np
+
+'''
+    Checkpoints of a running SlimeModel. A checkpoint is one compressed .npz
+        file holding the cAMP field, the agent arrays, the collected data and
+        a JSON header with the constructor arguments, step count, counters and
+        the state of every random stream. A model rebuilt with
+        loadCheckpoint continues the exact trajectory of the saved one.
+'''
+
+# Version of the checkpoint layout
+checkpointVersion = 3
+
+# Save the state of model to path (written to a temporary file first, so a crash never leaves half a checkpoint)
+def saveCheckpoint(model, path):
+    pop = model.population
+
+    header = {
+        "version": checkpointVersion,
+        "params": model.params,
+        "width": model.width,
+        "height": model.height,
+        "steps": model.schedule.steps,
+        "time": model.schedule.time,
+        "j": model.j,
+        "color": pop.color,
+        "tileSeed": model.tileSeed,
+        "seed": model.seed,
+        "rngs": {"init": model.initRng.bit_generator.state,
+                 "noise": model.noiseRng.bit_generator.state,
+                 "move": model.moveRng.bit_generator.state},
+        "trajectory": None if model.trajectory is None else model.trajectory.path,
+        "trajectoryInterval": model.trajectoryInterval
+    }
+
+    arrays = {
+        "field": model.field.amounts,
+        "x": pop.x,
+        "y": pop.y,
+        "secRate": pop.secRate,
+        "layer": pop.layer,
+        "shade": pop.shade,
+        "occupancy": model.occupancy
+    }
+
+    collector = model.datacollector
+    if model.params["arrayCollector"]:
+        arrays["collectorSteps"] = collector.getSteps()
+        arrays["collectorTotals"] = collector.getTotals()
+        arrays["collectorClusters"] = collector.getClusters()
+        arrays["collectorColAmts"] = collector.getColAmts()
+        arrays["collectorRowAmts"] = collector.getRowAmts()
+    else:
+        header["collectorNames"] = list(collector.model_vars.keys())
+        for (i, name) in enumerate(header["collectorNames"]):
+            arrays["collectorVar" + str(i)] = np.array(collector.model_vars[name])
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        np.savez_compressed(file, header=np.array(json.dumps(header)), **arrays)
+    os.replace(temporary, path)
+
+# Rebuild a model from the checkpoint at path, keyword arguments override constructor arguments
+def loadCheckpoint(path, **overrides):
+    from model import SlimeModel
+
+    with np.load(path) as data:
+        header = json.loads(str(data["header"]))
+        arrays = {name: data[name] for name in data.files if name != "header"}
+
+    if header["version"] != checkpointVersion:
+        raise ValueError("unsupported checkpoint version: " + str(header["version"]))
+
+    params = dict(header["params"])
+    params.update(overrides)
+    model = SlimeModel(**params)
+    if (model.width, model.height) != (header["width"], header["height"]):
+        raise ValueError("checkpoint grid is " + str(header["width"]) + "x" + str(header["height"]) + ", model grid is " + str(model.width) + "x" + str(model.height))
+
+    model.restoreState(header, arrays)
+
+    return model
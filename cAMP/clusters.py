@@ -0,0 +1,88 @@
+import numpy as np
+
+'''
+    Cluster detection over the agent occupancy of the grid. A cluster is a
+        group of occupied cells connected through their Von Neumann neighbors.
+        Cells are joined with a vectorized union-find (hooking roots onto the
+        smaller root, then pointer jumping) so the whole grid is labeled with
+        a handful of array operations instead of a sweep per agent.
+'''
+
+# Label connected components of occupied cells, returns flat root index per cell (-1 if empty)
+def labelClusters(occupied):
+    width, height = occupied.shape
+    index = np.arange(width * height).reshape(width, height)
+
+    # Pairs of occupied cells that are neighbors along x and along y
+    alongX = occupied[:-1, :] & occupied[1:, :]
+    alongY = occupied[:, :-1] & occupied[:, 1:]
+    a = np.concatenate((index[:-1, :][alongX], index[:, :-1][alongY]))
+    b = np.concatenate((index[1:, :][alongX], index[:, 1:][alongY]))
+
+    parent = index.ravel().copy()
+    while True:
+        rootA = parent[a]
+        rootB = parent[b]
+        joined = rootA != rootB
+        if not joined.any():
+            break
+
+        # Hook the larger root of every pair onto the smaller one
+        np.minimum.at(parent, np.maximum(rootA[joined], rootB[joined]), np.minimum(rootA[joined], rootB[joined]))
+
+        # Pointer jumping until every cell points at its root
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    return np.where(occupied.ravel(), parent, -1).reshape(width, height)
+
+
+# Clusters found on a grid from the number of agents on every cell
+class Clusters:
+    def __init__(self, counts):
+        roots = labelClusters(counts > 0)
+        occupied = roots >= 0
+
+        # Cluster id of every occupied cell
+        rootIds, ids = np.unique(roots[occupied], return_inverse=True)
+        # Cluster id of every cell (-1 if empty)
+        self.labels = np.full(counts.shape, -1, dtype=np.int64)
+        self.labels[occupied] = ids
+
+        # Number of clusters
+        self.count = len(rootIds)
+
+        xs, ys = np.nonzero(occupied)
+        agents = counts[occupied]
+        # Number of cells in every cluster
+        self.areas = np.bincount(ids, minlength=self.count)
+        # Number of agents in every cluster
+        self.sizes = np.bincount(ids, weights=agents, minlength=self.count).astype(np.int64)
+        # Agent weighted centroid (x, y) of every cluster
+        self.centroids = np.zeros((self.count, 2), dtype=np.float64)
+        if self.count > 0:
+            self.centroids[:, 0] = np.bincount(ids, weights=agents * xs) / self.sizes
+            self.centroids[:, 1] = np.bincount(ids, weights=agents * ys) / self.sizes
+
+    # Get number of clusters
+    def getCount(self):
+        return self.count
+
+    # Get number of agents in every cluster
+    def getSizes(self):
+        return self.sizes
+
+    # Get number of cells in every cluster
+    def getAreas(self):
+        return self.areas
+
+    # Get centroid (x, y) of every cluster
+    def getCentroids(self):
+        return self.centroids
+
+    # Get cluster id of every cell (-1 if empty)
+    def getLabels(self):
+        return self.labels
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+'''
+    Columnar replacement for Mesa's DataCollector. Row and column profiles,
+        the total amount of cAMP and the number of clusters are written into
+        preallocated NumPy arrays (one row per collected step) that double in
+        size when full, instead of one Python object per reporter per step.
+'''
+
+# Read-only mapping of reporter names ("Total Amount of cAMP", "x: 3", ...) to collected arrays
+class ArrayVars:
+    def __init__(self, collector):
+        self.collector = collector
+
+        # Reporter name -> (getter, column index or None)
+        self.columns = {"Total Amount of cAMP": (collector.getTotals, None),
+                        "Number of Clusters": (collector.getClusters, None)}
+        for x in range(collector.width):
+            self.columns["x: " + str(x)] = (collector.getColAmts, x)
+        for y in range(collector.height):
+            self.columns["y: " + str(y)] = (collector.getRowAmts, y)
+
+    # Get collected values of a reporter
+    def __getitem__(self, name):
+        getter, index = self.columns[name]
+        if index is None:
+            return getter()
+
+        return getter()[:, index]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def keys(self):
+        return self.columns.keys()
+
+    # Get collected values of a reporter, default if there is no such reporter
+    def get(self, name, default=None):
+        if name not in self.columns:
+            return default
+
+        return self[name]
+
+
+class ArrayCollector:
+    def __init__(self, width, height, capacity=1024):
+        # width of grid
+        self.width = width
+        # height of grid
+        self.height = height
+        # Number of collected steps
+        self.n = 0
+
+        # Step number of every collected row
+        self.steps = np.zeros(capacity, dtype=np.int64)
+        # Total amount of cAMP
+        self.totals = np.zeros(capacity, dtype=np.float64)
+        # Number of clusters
+        self.clusters = np.zeros(capacity, dtype=np.int64)
+        # Amount of cAMP in every column (x)
+        self.colAmts = np.zeros((capacity, width), dtype=np.float64)
+        # Amount of cAMP in every row (y)
+        self.rowAmts = np.zeros((capacity, height), dtype=np.float64)
+
+        # Mesa style access to the collected values (used by ChartModule)
+        self.model_vars = ArrayVars(self)
+
+    # Double the capacity of every array
+    def grow(self):
+        self.steps = np.concatenate((self.steps, np.zeros_like(self.steps)))
+        self.totals = np.concatenate((self.totals, np.zeros_like(self.totals)))
+        self.clusters = np.concatenate((self.clusters, np.zeros_like(self.clusters)))
+        self.colAmts = np.concatenate((self.colAmts, np.zeros_like(self.colAmts)))
+        self.rowAmts = np.concatenate((self.rowAmts, np.zeros_like(self.rowAmts)))
+
+    # Collect the current values of the model
+    def collect(self, model):
+        if self.n == len(self.steps):
+            self.grow()
+
+        self.steps[self.n] = model.schedule.steps
+        self.totals[self.n] = model.getAmts()
+        self.clusters[self.n] = model.getClusterCount()
+        self.colAmts[self.n] = model.getColAmts()
+        self.rowAmts[self.n] = model.getRowAmts()
+        self.n += 1
+
+    # Replace the collected values (used when a run is resumed from a checkpoint)
+    def restore(self, steps, totals, clusters, colAmts, rowAmts):
+        self.n = 0
+        while len(self.steps) < len(steps):
+            self.grow()
+
+        self.n = len(steps)
+        self.steps[:self.n] = steps
+        self.totals[:self.n] = totals
+        self.clusters[:self.n] = clusters
+        self.colAmts[:self.n] = colAmts
+        self.rowAmts[:self.n] = rowAmts
+
+    # Get step numbers of the collected rows
+    def getSteps(self):
+        return self.steps[:self.n]
+
+    # Get total amount of cAMP of every collected step
+    def getTotals(self):
+        return self.totals[:self.n]
+
+    # Get number of clusters of every collected step
+    def getClusters(self):
+        return self.clusters[:self.n]
+
+    # Get amount of cAMP in every column, one row per collected step
+    def getColAmts(self):
+        return self.colAmts[:self.n]
+
+    # Get amount of cAMP in every row, one row per collected step
+    def getRowAmts(self):
+        return self.rowAmts[:self.n]
+
+    # Get collected values as a DataFrame with the same columns as the Mesa DataCollector (column by column, so
+    #   the number of clusters stays an integer)
+    def get_model_vars_dataframe(self):
+        data = {"Total Amount of cAMP": self.getTotals(), "Number of Clusters": self.getClusters()}
+        colAmts = self.getColAmts()
+        for x in range(self.width):
+            data["x: " + str(x)] = colAmts[:, x]
+        rowAmts = self.getRowAmts()
+        for y in range(self.height):
+            data["y: " + str(y)] = rowAmts[:, y]
+
+        return pd.DataFrame(data)
@@ -0,0 +1,163 @@
+import base64
+import os
+import zlib
+
+import numpy as np
+from mesa.visualization.ModularVisualization import VisualizationElement
+
+from agents import slimeShades
+from field import blockSums
+from palette import grayShades, grayBuckets, dataVisColors, dataVisBucket
+from population import shadeTable
+
+'''
+    Delta-encoded canvas for the visualization server. Instead of one JSON
+        portrayal dict per cell and per agent every step, the canvas sends two
+        rasters of small integers (the gray bucket of every cell and the shade
+        of the top agent on every cell) in a full frame, then only the cells
+        whose value changed since the previous frame. Full frames are sent
+        for a new model and every keyframeInterval frames. With compress=True
+        rasters are sent as base64 zlib-compressed bytes instead of lists.
+        With block > 1 the canvas shows blocks of block x block cells: the
+        gray of the mean amount of cAMP in the block and the shade the agents
+        of the block would have on one cell.
+
+    Frame layout (one per step):
+        frame       frame number (a client that misses one waits for the next full frame)
+        full        whether the frame holds every cell
+        field       gray buckets, as a raster or as changed cells
+        agents      shade + 1 of the top agent on every cell (0 for empty cells), as a raster or as changed cells
+        dataVis     [x, y, color, text] of every DataVis and NumDataVis agent, or of one pair per row of blocks (only when changed)
+        width, height, palette, shades (full frames only, width and height in blocks)
+'''
+
+# JavaScript of the canvas (sent inline with the page, so the server can be launched from any directory)
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "DeltaCanvasModule.js")) as file:
+    deltaCanvasScript = file.read()
+
+# Encode a raster of small integers as a list, or as base64 zlib-compressed bytes
+def encodeRaster(raster, compress=False):
+    if compress:
+        data = zlib.compress(raster.astype(np.int8).tobytes())
+        return {"encoding": "zlib", "data": base64.b64encode(data).decode("ascii")}
+
+    return {"encoding": "list", "data": raster.tolist()}
+
+# Encode the cells of raster that differ from previous (the whole raster if that is smaller)
+def encodeChanges(raster, previous, compress=False):
+    changed = np.flatnonzero(raster != previous)
+    if 2 * len(changed) >= len(raster):
+        return encodeRaster(raster, compress)
+
+    return {"encoding": "delta", "cells": changed.tolist(), "values": raster[changed].tolist()}
+
+# Number of blocks of block x block cells along the width and height of model
+def getBlockShape(model, block):
+    return -(-model.width // block), -(-model.height // block)
+
+# Gray bucket of every block of model, by flat block index
+def getFieldRaster(model, block=1):
+    return grayBuckets(model.field.getBlockMeans(block)).ravel()
+
+# Shade + 1 of the top agent on every block of model (0 for empty blocks), by flat block index
+def getAgentRaster(model, block=1):
+    if block > 1:
+        counts = blockSums(model.getOccupancy(), block).ravel()
+        raster = (shadeTable[np.minimum(counts, len(shadeTable) - 1)] + 1).astype(np.int8)
+        raster[counts == 0] = 0
+        return raster
+
+    pop = model.population
+    order, starts = pop.getCellIndex(model.width, model.height)
+    raster = np.zeros(model.width * model.height, dtype=np.int8)
+
+    # The last agent of every occupied cell in cell order is the top of its stack
+    occupied = np.flatnonzero(starts[1:] > starts[:-1])
+    raster[occupied] = pop.shade[order[starts[occupied + 1] - 1]] + 1
+
+    return raster
+
+# Portrayal of the DataVis and NumDataVis agents of model as [x, y, color, text]. With block > 1 every row of
+#   blocks gets one DataVis and NumDataVis pair right of the blocks, showing the mean amount of its rows.
+def getDataVis(model, block=1):
+    dataVis = list()
+    if len(model.dataVis) == 0:
+        return dataVis
+
+    if block == 1:
+        for vis in model.dataVis:
+            if hasattr(vis, "getNum"):
+                dataVis.append([vis.getX(), vis.getY(), "#ffffff", vis.getNum()])
+            else:
+                dataVis.append([vis.getX(), vis.getY(), vis.getColor(), None])
+        return dataVis
+
+    (width, height) = getBlockShape(model, block)
+    rowAmts = model.getRowAmts()
+    for y in range(height):
+        amt = rowAmts[y * block:(y + 1) * block].mean()
+        dataVis.append([width, y, dataVisColors[dataVisBucket(amt)], None])
+        dataVis.append([width + 1, y, "#ffffff", str(amt)[0:4]])
+
+    return dataVis
+
+
+class DeltaCanvasGrid(VisualizationElement):
+    package_includes = []
+    local_includes = []
+
+    def __init__(self, grid_width, grid_height, canvas_width=500, canvas_height=500, compress=False, keyframeInterval=100,
+                 block=1, dataVisColumns=0):
+        super().__init__()
+        # Side of the blocks of cells drawn as one cell
+        self.block = block
+        # Whether rasters are sent compressed
+        self.compress = compress
+        # Number of frames between full frames
+        self.keyframeInterval = keyframeInterval
+
+        # Number of the next frame
+        self.frame = 0
+        # Frames sent since the last full frame
+        self.sinceKeyframe = 0
+        # Model and values of the last frame
+        self.model = None
+        self.field = None
+        self.agents = None
+        self.dataVis = None
+
+        self.js_code = deltaCanvasScript + "\nelements.push(new DeltaCanvasModule({}, {}, {}, {}));".format(
+            canvas_width, canvas_height, -(-grid_width // block) + dataVisColumns, -(-grid_height // block))
+
+    def render(self, model):
+        with model.profiler.phase("portrayal"):
+            field = getFieldRaster(model, self.block)
+            agents = getAgentRaster(model, self.block)
+            dataVis = getDataVis(model, self.block)
+
+            full = (model is not self.model or self.field is None or len(field) != len(self.field)
+                    or self.sinceKeyframe + 1 >= self.keyframeInterval)
+
+            frame = {"frame": self.frame, "full": full}
+            if full:
+                (width, height) = getBlockShape(model, self.block)
+                frame.update({"width": width, "height": height, "palette": grayShades,
+                              "shades": slimeShades.get(model.population.color, slimeShades["Blue"]),
+                              "field": encodeRaster(field, self.compress),
+                              "agents": encodeRaster(agents, self.compress),
+                              "dataVis": dataVis})
+                self.model = model
+                self.sinceKeyframe = 0
+            else:
+                frame["field"] = encodeChanges(field, self.field, self.compress)
+                frame["agents"] = encodeChanges(agents, self.agents, self.compress)
+                if dataVis != self.dataVis:
+                    frame["dataVis"] = dataVis
+                self.sinceKeyframe += 1
+
+            self.field = field
+            self.agents = agents
+            self.dataVis = dataVis
+            self.frame += 1
+
+            return frame
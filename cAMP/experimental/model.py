@@ -83,7 +83,7 @@ class SlimeModel(Model):
         # Initial loop to create agents and fill agents list with them
         for (contents, x, y) in self.grid.coord_iter():
             # Create object of type cAMP
-            cell = cAMP([x, y], self, self.j, 0)
+            cell = cAMP((x, y), self, self.j, 0)
             # Add random amoutn of cAMP to cell (<1)
             cell.add(random.random())
             # Place cAMP onto grid at coordinates x, y
@@ -459,5 +459,6 @@ canvas_element = CanvasGrid(cAMP_portrayal, masterWidth, masterHeight, 550, 550)
 
 # Creating ModularServer
 server = ModularServer(SlimeModel, [canvas_element, bar_chart_element_col, bar_chart_element_row, chart_element], "Keller-Segel Slime Mold Aggregation Model", model_params)
-# Launching Server
-server.launch()
+if __name__ == "__main__":
+    # Launching Server
+    server.launch()
@@ -0,0 +1,151 @@
+import numpy as np
+
+import kernels
+
+'''
+    Array backed cAMP field. The concentration of every cell is stored in one
+        2-D float64 array indexed [x, y] (same order as MultiGrid coordinates),
+        so decay, diffusion and secretion are done for the whole grid at once.
+        The update is double-buffered: every cell is computed from the current
+        buffer into a preallocated next buffer, then the two are swapped, so no
+        cell reads a neighbor that was already updated in the same step and no
+        arrays are allocated per step.
+'''
+
+# Sum of values ([x, y] array) over blocks of block x block cells (blocks on the far edges may be smaller)
+def blockSums(values, block):
+    width, height = values.shape
+    blocksX = -(-width // block)
+    blocksY = -(-height // block)
+
+    padded = np.zeros((blocksX * block, blocksY * block), dtype=values.dtype)
+    padded[:width, :height] = values
+
+    return padded.reshape(blocksX, block, blocksY, block).sum(axis=(1, 3))
+
+# Mean of values ([x, y] array) over blocks of block x block cells
+def blockMeans(values, block):
+    if block == 1:
+        return values
+
+    return blockSums(values, block) / blockSums(np.ones(values.shape), block)
+
+class cAMPField:
+    def __init__(self, width, height, decRate, compiled=False):
+        # width of grid
+        self.width = width
+        # height of grid
+        self.height = height
+        # rate of cAMP decay
+        self.decay = decRate
+        # Whether to use the compiled kernel (only if Numba is installed)
+        self.compiled = compiled and kernels.numbaAvailable
+
+        # Concentration of cAMP in every cell (current buffer)
+        self.amounts = np.zeros((width, height), dtype=np.float64)
+        # Buffer the next step is written into before the swap
+        self.next = np.zeros((width, height), dtype=np.float64)
+        # Work buffer for the neighbor sum and Laplacian
+        self.work = np.zeros((width, height), dtype=np.float64)
+
+        # Cells that take part in decay/diffusion (False for the halo rows of a tile, see parallel.py)
+        self.active = np.ones((width, height), dtype=bool)
+        # Work buffer for the cells left out of decay/diffusion
+        self.inactive = np.zeros((width, height), dtype=bool)
+
+    # Get amount of cAMP at a position
+    def getAmt(self, pos):
+        return self.amounts[pos[0], pos[1]]
+
+    # Add some amount of cAMP at a position (amount never drops below 0)
+    def add(self, pos, amt):
+        if (self.amounts[pos[0], pos[1]] + amt) > 0:
+            self.amounts[pos[0], pos[1]] += amt
+        else:
+            self.amounts[pos[0], pos[1]] = 0
+
+    # Get total amount of cAMP on the grid
+    def getTotal(self):
+        return self.amounts.sum()
+
+    # Get amount of cAMP in every column (x) and every row (y)
+    def getMarginals(self):
+        colAmts = self.amounts.sum(axis=1)
+        rowAmts = self.amounts.sum(axis=0)
+
+        return colAmts, rowAmts
+
+    # Get mean amount of cAMP in every block of block x block cells, as an [x, y] array of blocks
+    def getBlockMeans(self, block):
+        return blockMeans(self.amounts, block)
+
+    # Get decay rate
+    def getDecayRate(self):
+        return self.decay
+
+    # Set decay rate
+    def setDecayRate(self, drParam):
+        self.decay = drParam
+
+    # Sum of the Von Neumann neighbors of every cell (cells outside the grid count as 0)
+    def neighborSum(self, out=None):
+        if out is None:
+            out = np.zeros_like(self.amounts)
+        else:
+            out.fill(0)
+
+        out[1:, :] += self.amounts[:-1, :]
+        out[:-1, :] += self.amounts[1:, :]
+        out[:, 1:] += self.amounts[:, :-1]
+        out[:, :-1] += self.amounts[:, 1:]
+
+        return out
+
+    # Laplacian of the whole field
+    def laplacian(self, Dh, out=None, scratch=None):
+        out = self.neighborSum(out)
+        if scratch is None:
+            scratch = np.empty_like(self.amounts)
+
+        np.multiply(self.amounts, 4, out=scratch)
+        np.subtract(out, scratch, out=out)
+        np.divide(out, Dh**2, out=out)
+
+        return out
+
+    # Swap the current and next buffers
+    def swap(self):
+        self.amounts, self.next = self.next, self.amounts
+
+    # Perform decay, diffusion and secretion for the whole grid
+    def step(self, Dc, Dh, Dt, secretion=None):
+        if self.compiled:
+            if secretion is None:
+                secretion = self.work
+                secretion.fill(0)
+            kernels.fieldKernel(self.amounts, self.active, secretion, self.next, self.decay, Dc, Dh, Dt)
+            self.swap()
+            return
+
+        current = self.amounts
+        new = self.next
+        change = self.work
+
+        # Decay and diffusion, read from the current buffer only
+        self.laplacian(Dh, out=change, scratch=new)
+        np.multiply(change, Dc, out=change)
+        np.multiply(current, -self.decay, out=new)
+        np.add(new, change, out=change)
+        np.multiply(change, Dt, out=change)
+
+        # Write new amounts (never below 0) into the next buffer, inactive cells keep theirs
+        np.add(current, change, out=new)
+        np.maximum(new, 0, out=new)
+        np.logical_not(self.active, out=self.inactive)
+        np.copyto(new, current, where=self.inactive)
+
+        # Add cAMP secreted by agents (already scaled by Dt)
+        if secretion is not None:
+            np.add(new, secretion, out=new)
+
+        self.swap()
@@ -0,0 +1,92 @@
+import json
+
+import tornado.escape
+from mesa.visualization.ModularVisualization import ModularServer, SocketHandler
+from mesa.visualization.modules import ChartModule
+
+'''
+    Frame skipping for the visualization server. FrameServer advances the
+        model stepsPerFrame steps for every frame the browser asks for and
+        renders only after the last one, so the live view is not throttled
+        to one model step per browser frame. StepChartModule sends the value
+        of every step since the last frame, so the chart still gets one
+        point per model step.
+
+    Example:
+        server = FrameServer(SlimeModel, [canvas_element, StepChartModule(series)], name, model_params,
+                             stepsPerFrame=10)
+'''
+
+# Socket handler stepping the model stepsPerFrame times per requested frame
+class FrameSocketHandler(SocketHandler):
+    def on_message(self, message):
+        msg = tornado.escape.json_decode(message)
+        model = self.application.model
+
+        if msg["type"] == "get_step":
+            # Steps without rendering, the last step of the frame is taken (and rendered) by the Mesa handler
+            for i in range(self.application.stepsPerFrame - 1):
+                if not model.running:
+                    break
+                model.step()
+
+        super().on_message(message)
+
+
+class FrameServer(ModularServer):
+    socket_handler = (r"/ws", FrameSocketHandler)
+    handlers = [ModularServer.page_handler, socket_handler, ModularServer.static_handler, ModularServer.local_handler]
+
+    def __init__(self, model_cls, visualization_elements, name="Mesa Model", model_params={}, stepsPerFrame=1):
+        # Number of model steps per rendered frame
+        self.stepsPerFrame = stepsPerFrame
+        super().__init__(model_cls, visualization_elements, name, model_params)
+
+
+# JavaScript of the chart: a Mesa ChartModule given one point per step, labeled with the step number
+stepChartScript = """
+var StepChartModule = function(chart) {
+    this.render = function(data) {
+        // ChartModule labels a point with control.tick, so the tick is swapped for the step of every point
+        var tick = control.tick;
+        for (var i = 0; i < data.length; i++) {
+            control.tick = data[i][0];
+            chart.render(data[i][1]);
+        }
+        control.tick = tick;
+    };
+
+    this.reset = function() {
+        chart.reset();
+    };
+};
+"""
+
+# Line chart getting the values of every step collected since the last frame
+class StepChartModule(ChartModule):
+    def __init__(self, series, canvas_height=200, canvas_width=500, data_collector_name="datacollector"):
+        super().__init__(series, canvas_height, canvas_width, data_collector_name)
+        # Model the sent values belong to and the number of values sent
+        self.model = None
+        self.sent = 0
+
+        self.js_code = stepChartScript + "elements.push(new StepChartModule(new ChartModule({}, {}, {})));".format(
+            json.dumps(self.series), canvas_width, canvas_height)
+
+    def render(self, model):
+        if model is not self.model:
+            self.model = model
+            self.sent = 0
+
+        data_collector = getattr(model, self.data_collector_name)
+        columns = [data_collector.model_vars.get(s["Label"], []) for s in self.series]
+        collected = max((len(column) for column in columns), default=0)
+
+        # [step, [value of every series]] for every step collected since the last frame
+        points = list()
+        for i in range(self.sent, collected):
+            step = model.schedule.steps - collected + i + 1
+            points.append([step, [column[i] if i < len(column) else 0 for column in columns]])
+        self.sent = collected
+
+        return points
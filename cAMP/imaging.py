@@ -0,0 +1,254 @@
+import argparse
+import os
+import struct
+import zlib
+
+import numpy as np
+from colour import Color
+
+from agents import slimeShades
+from field import blockMeans, blockSums
+from palette import grayShades, grayBuckets
+from population import shadeTable
+
+try:
+    import imageio
+    imageioAvailable = True
+except ImportError:
+    # Without imageio only PNG frames and animated PNG files can be written
+    imageioAvailable = False
+
+'''
+    Headless export of the cAMP field and agent density to images, without a
+        browser. A frame is rendered straight from the field and the number
+        of agents on every cell, with the same palettes as the server's
+        canvas: the gray of every cell (palette.grayShades) and a disc on
+        every occupied cell in the shade its agents get for their number
+        (slimeShades, shadeTable). y grows upwards as on the canvas.
+
+    Frames are written as PNG files into a directory, as one animated PNG
+        file (.png/.apng), or as .gif/.mp4 when imageio is installed. PNG
+        encoding needs nothing beyond zlib.
+
+    Example:
+        python batch.py --steps 1000 --export frames --exportInterval 10
+        python imaging.py trajectoryDir movie.apng --interval 5 --scale 8
+'''
+
+# RGB bytes of a list of colors (an entry with extra hex digits is read from its first six)
+def rgbTable(colors):
+    table = np.zeros((len(colors), 3), dtype=np.uint8)
+    for (i, color) in enumerate(colors):
+        try:
+            rgb = Color(color).rgb
+        except (AttributeError, ValueError):
+            rgb = Color(color[:7]).rgb
+        table[i] = np.round(np.array(rgb) * 255)
+
+    return table
+
+# RGB of every gray bucket
+grayRGB = rgbTable(grayShades)
+# RGB of the shades of every agent color
+shadeRGB = {name: rgbTable(shades) for (name, shades) in slimeShades.items()}
+
+# Pixels of a square cell of scale x scale pixels covered by the agent disc (.65 of the cell as on the canvas,
+#   at least the central pixels)
+def discMask(scale):
+    radius = max(.65 * scale / 2, .75)
+    centers = np.arange(scale) + .5 - scale / 2
+
+    return centers[:, None] ** 2 + centers[None, :] ** 2 <= radius ** 2
+
+# Render a field ([x, y] amounts) and the number of agents on every cell to an RGB image (rows x columns x 3).
+#   Every cell (or block of block x block cells) is scale x scale pixels.
+def renderFrame(amounts, occupancy=None, color="Blue", scale=4, block=1):
+    # [x, y] -> [row, column] with y growing upwards
+    toImage = lambda values: np.ascontiguousarray(np.swapaxes(values, 0, 1)[::-1])
+
+    cells = toImage(grayRGB[grayBuckets(blockMeans(amounts, block))])
+    image = np.repeat(np.repeat(cells, scale, axis=0), scale, axis=1)
+
+    if occupancy is not None:
+        counts = toImage(blockSums(occupancy, block))
+        shades = shadeRGB.get(color, shadeRGB["Blue"])[shadeTable[np.minimum(counts, len(shadeTable) - 1)]]
+        rows, columns = counts.shape
+
+        # Disc pixels of every occupied cell
+        mask = ((counts > 0)[:, None, :, None] & discMask(scale)[None, :, None, :]).reshape(rows * scale, columns * scale)
+        image[mask] = np.repeat(np.repeat(shades, scale, axis=0), scale, axis=1)[mask]
+
+    return image
+
+# Write a PNG chunk to a file
+def writeChunk(file, kind, data):
+    file.write(struct.pack(">I", len(data)))
+    file.write(kind + data)
+    file.write(struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff))
+
+# Compress an RGB image into PNG image data (no filtering)
+def encodeImage(image):
+    rows = np.concatenate([np.zeros((image.shape[0], 1), dtype=np.uint8), image.reshape(image.shape[0], -1)], axis=1)
+
+    return zlib.compress(rows.tobytes())
+
+# PNG header chunk of an RGB image (8 bits per channel)
+def imageHeader(image):
+    return struct.pack(">IIBBBBB", image.shape[1], image.shape[0], 8, 2, 0, 0, 0)
+
+# Write an RGB image to a PNG file
+def writePNG(path, image):
+    with open(path, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n")
+        writeChunk(file, b"IHDR", imageHeader(image))
+        writeChunk(file, b"IDAT", encodeImage(image))
+        writeChunk(file, b"IEND", b"")
+
+
+# Animated PNG written frame by frame (the number of frames is filled in on close)
+class APNGWriter:
+    def __init__(self, path, fps=10):
+        self.file = open(path, "w+b")
+        # Frames per second
+        self.fps = fps
+        # Number of written frames
+        self.frames = 0
+        # Sequence number of the next frame control or frame data chunk
+        self.sequence = 0
+        # Where the animation control chunk starts in the file
+        self.control = None
+        # Size of the frames (rows, columns)
+        self.shape = None
+
+    # Append an RGB image as the next frame
+    def append(self, image):
+        if self.shape is None:
+            self.shape = image.shape[:2]
+            self.file.write(b"\x89PNG\r\n\x1a\n")
+            writeChunk(self.file, b"IHDR", imageHeader(image))
+            self.control = self.file.tell()
+            writeChunk(self.file, b"acTL", struct.pack(">II", 0, 0))
+        elif image.shape[:2] != self.shape:
+            raise ValueError("frame of " + str(image.shape[:2]) + " pixels in an animation of " + str(self.shape))
+
+        writeChunk(self.file, b"fcTL", struct.pack(">IIIIIHHBB", self.sequence, image.shape[1], image.shape[0], 0, 0,
+                                                   1, self.fps, 0, 0))
+        self.sequence += 1
+
+        data = encodeImage(image)
+        if self.frames == 0:
+            # The first frame is also the still image
+            writeChunk(self.file, b"IDAT", data)
+        else:
+            writeChunk(self.file, b"fdAT", struct.pack(">I", self.sequence) + data)
+            self.sequence += 1
+        self.frames += 1
+
+    # Write the number of frames and the end of the file
+    def close(self):
+        if self.file is None:
+            return
+
+        if self.frames > 0:
+            writeChunk(self.file, b"IEND", b"")
+            self.file.seek(self.control)
+            writeChunk(self.file, b"acTL", struct.pack(">II", self.frames, 0))
+        self.file.close()
+        self.file = None
+
+
+class FrameExporter:
+    def __init__(self, path, interval=1, scale=4, color="Blue", block=1, fps=10, agents=True):
+        # Directory of PNG frames, or animation file (.png/.apng, or .gif/.mp4 with imageio)
+        self.path = path
+        # Export every this many steps
+        self.interval = interval
+        # Pixels per cell (or block)
+        self.scale = scale
+        # Agent color (shades of slimeShades)
+        self.color = color
+        # Side of the blocks of cells drawn as one cell
+        self.block = block
+        # Whether agents are drawn over the field
+        self.agents = agents
+        # Number of exported frames
+        self.frames = 0
+
+        extension = os.path.splitext(path)[1].lower()
+        if extension in (".png", ".apng"):
+            self.writer = APNGWriter(path, fps)
+        elif extension in (".gif", ".mp4"):
+            if not imageioAvailable:
+                raise ImportError("exporting " + extension + " files needs imageio (PNG frames and .apng do not)")
+            self.writer = imageio.get_writer(path, fps=fps)
+        else:
+            # One PNG file per frame
+            os.makedirs(path, exist_ok=True)
+            self.writer = None
+
+    # Render and write the frame of a step
+    def addFrame(self, step, amounts, occupancy=None):
+        image = renderFrame(amounts, occupancy if self.agents else None, self.color, self.scale, self.block)
+        if self.writer is None:
+            writePNG(os.path.join(self.path, "frame%06d.png" % step), image)
+        elif isinstance(self.writer, APNGWriter):
+            self.writer.append(image)
+        else:
+            self.writer.append_data(image)
+        self.frames += 1
+
+    # Export the current state of a model if its step is on the interval
+    def observe(self, model):
+        if model.schedule.steps % self.interval == 0:
+            self.addFrame(model.schedule.steps, model.field.amounts, model.getOccupancy())
+
+    # Export the step event of a model observer subscription (topics field and occupancy)
+    def onEvent(self, event):
+        self.addFrame(event.step, event["field"], event["occupancy"])
+
+    # Subscribe to the events of a model every interval steps (current exports the current state right away)
+    def subscribe(self, model, current=False):
+        return model.observers.subscribe(self.onEvent, ("field", "occupancy"), self.interval, current=current)
+
+    # Finish the animation file
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+# Export every interval-th record of a trajectory store
+def exportTrajectory(trajectoryPath, outPath, interval=1, **options):
+    from trajectory import openTrajectory
+
+    store = openTrajectory(trajectoryPath)
+    exporter = FrameExporter(outPath, interval, **options)
+    fields = store.getFields()
+    occupancy = store.getOccupancy()
+    for (i, step) in enumerate(store.getSteps()):
+        if step % interval == 0:
+            exporter.addFrame(int(step), fields[i], occupancy[i])
+    exporter.close()
+    store.close()
+
+    return exporter.frames
+
+# Parse command line arguments
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description="Export a recorded trajectory of the Keller-Segel Slime Mold Aggregation Model to images")
+    parser.add_argument("trajectory", help="directory of the recorded trajectory")
+    parser.add_argument("out", help="directory of PNG frames, or animation file (.png/.apng, .gif/.mp4 with imageio)")
+    parser.add_argument("--interval", type=int, default=1, help="export every this many steps")
+    parser.add_argument("--scale", type=int, default=4, help="pixels per cell")
+    parser.add_argument("--block", type=int, default=1, help="side of the blocks of cells drawn as one cell")
+    parser.add_argument("--color", default="Blue", choices=list(slimeShades), help="agent color")
+    parser.add_argument("--fps", type=int, default=10, help="frames per second of an animation file")
+    parser.add_argument("--noAgents", action="store_true", help="draw the field only")
+
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+    args = parseArgs()
+    frames = exportTrajectory(args.trajectory, args.out, args.interval, scale=args.scale, block=args.block,
+                              color=args.color, fps=args.fps, agents=not args.noAgents)
+    print(str(frames) + " frame(s) written to " + args.out)
@@ -0,0 +1,109 @@
+import math
+
+import numpy as np
+
+'''
+    Compiled kernels for the cAMP field update and the chemotaxis move rule.
+        They work on plain arrays and do the same arithmetic as the NumPy path
+        in cAMPField.step and SlimePopulation.proposeMoves, but as loops that
+        Numba compiles. When Numba is not installed numbaAvailable is False
+        and the model keeps using the NumPy path.
+
+    Run this file to check the kernels against the NumPy path:
+        python kernels.py
+'''
+
+try:
+    from numba import njit
+    numbaAvailable = True
+except ImportError:
+    numbaAvailable = False
+
+    # Without Numba the kernels are left as plain Python functions
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda function: function
+
+
+# Decay, diffusion and secretion of every cell, written into out
+@njit(cache=True)
+def fieldKernel(amounts, active, secretion, out, decay, Dc, Dh, Dt):
+    width, height = amounts.shape
+    for x in range(width):
+        for y in range(height):
+            amt = amounts[x, y]
+            if active[x, y]:
+                # Sum of Von Neumann neighbors (cells outside the grid count as 0)
+                total = 0.0
+                if x > 0:
+                    total += amounts[x - 1, y]
+                if x < width - 1:
+                    total += amounts[x + 1, y]
+                if y > 0:
+                    total += amounts[x, y - 1]
+                if y < height - 1:
+                    total += amounts[x, y + 1]
+
+                lap = (total - 4 * amt) / (Dh**2)
+                amt = max(amt + (-decay * amt + Dc * lap) * Dt, 0.0)
+
+            out[x, y] = amt + secretion[x, y]
+
+
+# Proposed position and move decision of every agent from pre-drawn offsets and uniforms
+@njit(cache=True)
+def moveKernel(x, y, offsets, uniforms, amounts, width, height, newx, newy, accept):
+    for i in range(len(x)):
+        newx[i] = (x[i] + offsets[0, i]) % width
+        newy[i] = (y[i] + offsets[1, i]) % height
+
+        # Amount of cAMP used for the logistic move probability, limited to [-10, 10]
+        diff = amounts[x[i] - 1, y[i] - 1]
+        if diff > 10:
+            diff = 10.0
+        elif diff < -10:
+            diff = -10.0
+
+        accept[i] = uniforms[i] < math.exp(diff) / (1 + math.exp(diff))
+
+
+# Check the kernels against the NumPy path on identical seeds, returns the largest field difference
+def verify(width=60, height=40, numAgents=2000, steps=50, seed=0):
+    from field import cAMPField
+    from population import SlimePopulation
+
+    rng = np.random.default_rng(seed)
+    xs = rng.integers(0, width, numAgents)
+    ys = rng.integers(0, height, numAgents)
+    start = rng.random((width, height))
+
+    paths = list()
+    for compiled in (False, True):
+        field = cAMPField(width, height, 0.1, compiled)
+        field.amounts[:] = start
+        field.active[-2:, :] = False
+        population = SlimePopulation(None, xs, ys, 5, "Blue", compiled)
+        stepRng = np.random.default_rng(seed)
+
+        for step in range(steps):
+            field.step(0.001, 0.01, 0.01, population.getSecretion(width, height, 0.01))
+            newx, newy, accept = population.proposeMoves(field.amounts, width, height, stepRng)
+            population.move(newx, newy, accept)
+
+        paths.append((field.amounts, population.x, population.y))
+
+    (reference, compiled) = paths
+    if not (np.array_equal(reference[1], compiled[1]) and np.array_equal(reference[2], compiled[2])):
+        raise AssertionError("agent positions differ between the NumPy and compiled paths")
+
+    difference = np.abs(reference[0] - compiled[0]).max()
+    if not np.allclose(reference[0], compiled[0]):
+        raise AssertionError("cAMP fields differ between the NumPy and compiled paths: " + str(difference))
+
+    return difference
+
+
+if __name__ == "__main__":
+    print("Numba available:", numbaAvailable)
+    print("Largest field difference:", verify())
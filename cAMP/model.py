@@ -3,28 +3,31 @@ from mesa.time import SimultaneousActivation
 from mesa.space import MultiGrid
 from mesa.datacollection import DataCollector
 
-from mesa.visualization.modules import CanvasGrid, ChartModule, BarChartModule
-from mesa.visualization.ModularVisualization import ModularServer
-import mesa.visualization.TextVisualization
-from mesa.visualization.UserParam import UserSettableParameter
-
-import random
 import math
 
 import numpy as np
-from agents import SlimeAgent, cAMP, DataVis, NumDataVis
-
-'''
-    Change only the value of masterHeight to change the dimensions of the grid
-        because it must always be a square.
-'''
-
-masterHeight = 15
-masterWidth = masterHeight
-#masterWidth = 52
+from agents import cAMP, DataVis, NumDataVis
+from field import cAMPField
+from population import SlimePopulation, shadeTable
+from clusters import Clusters
+from neighbors import NeighborIndex
+from collector import ArrayCollector
+from parallel import TiledStepper
+from shared import SharedArrays
+from trajectory import TrajectoryStore
+from checkpoint import saveCheckpoint
+from profiling import StepProfiler, NullProfiler
+from observers import ObserverHub
 
 class SlimeModel(Model):
-    def __init__(self, height, width, color, numAgents, gDense, kRate, dcDiffu, dhRes, dtRes, secRate):
+    def __init__(self, height, width, color, numAgents, gDense, kRate, dcDiffu, dhRes, dtRes, secRate, views=True, arrayCollector=False, compiled=False, tiles=1, shared=False, trajectory=None, trajectoryInterval=1, checkpoint=None, checkpointInterval=1000, seed=None, profile=False, dataVis=False):
+        # Constructor arguments (used to rebuild the model from a checkpoint)
+        self.params = {"height": height, "width": width, "color": color, "numAgents": numAgents, "gDense": gDense,
+                       "kRate": kRate, "dcDiffu": dcDiffu, "dhRes": dhRes, "dtRes": dtRes, "secRate": secRate,
+                       "views": views, "arrayCollector": arrayCollector, "compiled": compiled, "tiles": tiles,
+                       "shared": shared, "checkpoint": checkpoint, "checkpointInterval": checkpointInterval,
+                       "seed": seed, "profile": profile, "dataVis": dataVis}
+
         # number of agents per tile
         self.n = numAgents
         # grid density
@@ -39,15 +42,13 @@ class SlimeModel(Model):
         self.Dt = dtRes
         # rate of cAMP secretion by an agent
         self.f = secRate
-        # number of rows/columns in spatial array
-        self.w = masterHeight
         # agent color
         self.color = color
 
-        # height of grid
-        self.height = masterHeight
-        # width of grid
-        self.width = masterWidth
+        # height of grid (number of rows, y)
+        self.height = height
+        # width of grid (number of columns, x)
+        self.width = width
 
         # Counter for generating sequential unique id's
         self.j = 0
@@ -56,443 +57,414 @@ class SlimeModel(Model):
         # Counter for NumDataVis agents' unique id's
         self.ndv = 0
 
-        # Blacklist for agents in clustering
-        self.blacklist = list()
-        # List for current cluser agents
-        self.cluster_agents = list()
-        # List for cluster neighbors
-        self.cluster_neighbors = list()
-        # List to check how many cells have been examined during cluster detection
-        self.cells = 0
+        # Clusters found by the last sweep
+        self.clusters = None
+        # Subscribers to the events of every step (see observers.py)
+        self.observers = ObserverHub(self)
 
         # Create randomly ordered scheduler
         self.schedule = SimultaneousActivation(self)
-        # Create grid (of type MultiGrid to support multiple agents per cell
-        self.grid = MultiGrid(self.width, self.height, torus=False)
-
-        # Initialize list of cAMP molecules
+        # Number of columns right of the simulated grid holding the DataVis and NumDataVis agents
+        self.dataVisColumns = 2 if dataVis else 0
+        # Create grid (of type MultiGrid to support multiple agents per cell), with the DataVis columns past width.
+        #   Only views and DataVis agents are placed on it, so a headless model has none
+        self.grid = None
+        if views or dataVis:
+            self.grid = MultiGrid(self.width + self.dataVisColumns, self.height, torus=False)
+
+        # Create array backed cAMP field (concentration of every cell)
+        self.field = cAMPField(self.width, self.height, self.k, compiled)
+        # Independent random streams for every subsystem, all derived from seed (fresh entropy if None)
+        sequence = np.random.SeedSequence(seed)
+        (initSeq, noiseSeq, moveSeq, tileSeq) = sequence.spawn(4)
+        # Entropy the streams were derived from (pass as seed to repeat the run)
+        self.seed = sequence.entropy
+        # Stream for placing agents
+        self.initRng = np.random.default_rng(initSeq)
+        # Stream for the initial cAMP noise
+        self.noiseRng = np.random.default_rng(noiseSeq)
+        # Stream for the move rule
+        self.moveRng = np.random.default_rng(moveSeq)
+
+        # Number of tiles stepped by parallel worker processes (1 steps in this process)
+        self.tiles = tiles
+        # Stepper running the tile workers (started on the first step)
+        self.stepper = None
+        # Seed the random streams of the tiles are derived from
+        self.tileSeed = int(tileSeq.generate_state(1, np.uint64)[0])
+        # Arrays in shared memory other processes can attach to (only if shared is True)
+        self.shared = None
+
+        # Timing of the step phases (does nothing unless profile is True)
+        self.profiler = StepProfiler() if profile else NullProfiler()
+
+        # Whether cAMP and SlimeAgent views are placed on the grid for portrayal
+        self.views = views
+
+        # Von Neumann neighbors of every cell (built on the first neighbor query, step never needs them)
+        self.neighbors = None
+
+        # Initialize list of cAMP molecules (views of the field, by flat cell index)
         self.cAMPs = list()
+        # Initialize list of DataVis and NumDataVis agents
+        self.dataVis = list()
 
         # Initialize dict for datacollector with total datacollector
-        dc = {"Total Amount of cAMP": self.getAmts}
+        dc = {"Total Amount of cAMP": self.getAmts, "Number of Clusters": self.getClusterCount}
 
-        # Initialize for iterating through columns (x) and rows (y)
-        self.x = 0
-        self.y = 0
+        # Amounts of cAMP in every column (x) and row (y), computed once per step
+        self.colAmts = np.zeros(self.width, dtype=np.float64)
+        self.rowAmts = np.zeros(self.height, dtype=np.float64)
+        # Total amount of cAMP, computed once per step
+        self.totalAmt = 0
 
         # Loop to fill datacollector dictionary with dict entries for each column and row
-        for x in range(masterWidth):
-            dc.update({("x: " + str(x)): self.getColAmts})
-            dc.update({("y: " + str(x)): self.getRowAmts})
-
-        # Create datacollector to retrieve total amounts of cAMP from dc dict created above
-        self.datacollector = DataCollector(dc)
-
-        # Variable for storing random numbers
-        r = 0
-
-        # Initial loop to create agents and fill agents list with them
-        for (contents, x, y) in self.grid.coord_iter():
-            # Create object of type cAMP
-            cell = cAMP([x, y], self, self.j, 0, self.k)
-            # Add random amoutn of cAMP to cell (<1)
-            cell.add(random.random())
-            # Place cAMP onto grid at coordinates x, y
-            self.grid._place_agent((x, y), cell)
-            # Add cAMP molecule to list
-            self.cAMPs.append(cell)
-
-            # print("x:", x, " y:", y)
-
-            if x == 50:
+        for x in range(self.width):
+            dc.update({("x: " + str(x)): [self.getColAmt, [x]]})
+        for y in range(self.height):
+            dc.update({("y: " + str(y)): [self.getRowAmt, [y]]})
+
+        if arrayCollector:
+            # Create columnar datacollector that stores the same values in NumPy arrays
+            self.datacollector = ArrayCollector(self.width, self.height)
+        else:
+            # Create datacollector to retrieve total amounts of cAMP from dc dict created above
+            self.datacollector = DataCollector(dc)
+
+        # Add random amount of cAMP to every cell (<1)
+        self.field.amounts[:] = self.noiseRng.random((self.width, self.height))
+
+        # Cells SlimeAgents are created on (every simulated cell)
+        cells = np.ones((self.width, self.height), dtype=bool)
+        if self.gD % 1 != 0:
+            # Keep every cell with probability gD
+            cells &= self.initRng.random((self.width, self.height)) <= self.gD
+        # Coordinates of the SlimeAgents to create (numAgents per cell)
+        (agentX, agentY) = np.nonzero(cells)
+        agentX = np.repeat(agentX, self.n)
+        agentY = np.repeat(agentY, self.n)
+        # Increment j (unique_id variable)
+        self.j = len(agentX)
+
+        # Initial loop to create cAMP views of the simulated cells
+        if self.views:
+            for x in range(self.width):
+                for y in range(self.height):
+                    # Create object of type cAMP (view of the field)
+                    cell = cAMP([x, y], self, self.j, 0, self.k)
+                    # Place cAMP onto grid at coordinates x, y
+                    self.grid._place_agent((x, y), cell)
+                    # Add cAMP molecule to list
+                    self.cAMPs.append(cell)
+
+        # DataVis agent on the first column past the simulated grid, by row
+        self.rowDataVis = dict()
+        if dataVis:
+            for y in range(self.height):
                 # Create DataVis agent
-                ag = DataVis([x, y], self, self.dv)
+                ag = DataVis([self.width, y], self, self.dv)
                 # Place DataVis agent
-                self.grid.place_agent(ag, tuple([x, y]))
-
+                self.grid.place_agent(ag, (self.width, y))
+                # Add DataVis agent to list
+                self.dataVis.append(ag)
+                self.rowDataVis[y] = ag
                 # Increment unique id counter
                 self.dv += 1
-            elif x > 50:
-                # Create NumDataVis agent with appropriate slice num
-                ag = NumDataVis([x, y], self, self.ndv)
-                # Place NumDataVis agent
-                self.grid.place_agent(ag, tuple([x, y]))
 
+                # Create NumDataVis agent with appropriate slice num on the next column
+                ag = NumDataVis([self.width + 1, y], self, self.ndv)
+                # Place NumDataVis agent
+                self.grid.place_agent(ag, (self.width + 1, y))
+                # Add NumDataVis agent to list
+                self.dataVis.append(ag)
                 # Increment unique id counter
                 self.ndv += 1
-            else:
-                # Loop to create SlimeAgents
-                if self.gD % 1 != 0:
-                    r = random.random()
-                    if r <= self.gD:
-                        for i in range(self.n):
-                            # Create object of type SlimeAgent
-                            ag = SlimeAgent([x, y], self, self.j, 10, self.color)
-                            ag.setSecRate(5)
-                            # Place agent onto grid at coordinates x, y
-                            self.grid.place_agent(ag, tuple([x, y]))
-                            # Add agent to schedule
-                            self.schedule.add(ag)
-                            # Increment j (unique_id variable)
-                            self.j += 1
-                else:
-                    for i in range(self.n):
-                        # Create object of type SlimeAgent
-                        ag = SlimeAgent([x, y], self, self.j, 10, self.color)
-                        ag.setSecRate(5)
-                        # Place agent onto grid at coordinates x, y
-                        self.grid.place_agent(ag, tuple([x, y]))
-                        # Add agent to schedule
-                        self.schedule.add(ag)
-                        # Increment j (unique_id variable)
-                        self.j += 1
-
-        # Print out number of agents
-        print("# of agents:", self.j)
+
+        # Create population of SlimeAgents (secretion rate of 5)
+        self.population = SlimePopulation(self, agentX, agentY, 5, self.color, compiled)
+        # Place SlimeAgent views onto grid for portrayal
+        if self.views:
+            self.population.placeViews(self.grid)
+
+        # Compute initial row and column amounts
+        self.updateAmts()
+        # Number of agents on every cell (kept up to date as agents move)
+        self.occupancy = self.population.getCounts(self.width, self.height)
+        # Position of every agent in the stack on its cell
+        self.population.updateLayers(self.width, self.height)
+
+        # Move field buffers and occupancy into shared memory
+        if shared:
+            self.shareState()
+
+        # File a checkpoint is saved to every checkpointInterval steps
+        self.checkpointPath = checkpoint
+        self.checkpointInterval = checkpointInterval
+
+        # Memory-mapped store the field and occupancy are recorded to every trajectoryInterval steps
+        self.trajectory = None
+        self.trajectoryInterval = trajectoryInterval
+        if trajectory is not None:
+            self.trajectory = TrajectoryStore(trajectory, self.width, self.height)
+            self.recordTrajectory()
 
         self.running = True
 
+    # Method to compute row, column and total amounts of cAMP from the field in one pass
+    def updateAmts(self):
+        self.colAmts, self.rowAmts = self.field.getMarginals()
+        self.totalAmt = self.colAmts.sum()
+
     # Method for getting total cAMP amount
     def getAmts(self):
-        # Initialize empty total variable
-        total = 0
-        # Loop to get total amount of cAMP from cAMPs list
-        for molecule in self.cAMPs:
-            total += molecule.getAmt()
-
-        return total
+        return self.totalAmt
 
+    # Method for getting the amount of cAMP in every row
     def getRowAmts(self):
-        total = 0
-        for x in range(masterWidth):
-            try:
-                total += self.grid.get_cell_list_contents((x, self.y))[0].getAmt()
-            except IndexError:
-                continue
-
-        if self.y == 49:
-            self.y = 0
-        else:
-            self.y += 1
-
-        return total
+        return self.rowAmts
 
+    # Method for getting the amount of cAMP in row y
     def getRowAmt(self, y):
-        total = 0
-        for x in range(masterWidth - 1):
-            try:
-                total += self.grid.get_cell_list_contents((x, y))[0].getAmt()
-            except IndexError:
-                continue
-
-        if self.y == 49:
-            self.y = 0
-        else:
-            self.y += 1
-
-        return total
+        return self.rowAmts[y]
 
+    # Method for getting the amount of cAMP in every column
     def getColAmts(self):
-        total = 0
-        for y in range(masterHeight):
-            try:
-                total += self.grid.get_cell_list_contents((self.x, y))[0].getAmt()
-            except IndexError:
-                continue
-
-        if self.x == 49:
-            self.x = 0
-        else:
-            self.x += 1
+        return self.colAmts
 
-        return total
+    # Method for getting the amount of cAMP in column x
+    def getColAmt(self, x):
+        return self.colAmts[x]
 
-    # Method to determine if a given area has a cluster in it
-    def checkForCluster(self):
-#        print("cluster_agents len: ", len(self.cluster_agents), " | cells: ", self.cells)
+    # Method to sweep the grid for clusters (connected groups of occupied cells)
+    def sweepForClusters(self):
+        self.clusters = Clusters(self.occupancy)
 
-        # Return true if the amount of agents in an area divided by that area is greater than .2
-        if self.cells > 0 and len(self.cluster_agents) / self.cells > .2:
-            return True
+        return self.clusters
 
-        return False
+    # Method for getting the number of clusters found by the last sweep
+    def getClusterCount(self):
+        if self.clusters is None:
+            return 0
 
-    # Method to sweep the grid for clusters
-    def sweepForClusters(self):
-        for (contents, x, y) in self.grid.coord_iter():
-            self.cells += 1
-            if len(contents) == 1:
-                break
+        return self.clusters.getCount()
+
+    # Method to get the flat indices of the Von Neumann neighbors of pos
+    def getNeighborCells(self, pos):
+        if self.neighbors is None:
+            self.neighbors = NeighborIndex(self.width, self.height)
+
+        return self.neighbors.getNeighborCells(pos)
 
-            for agent in contents:
-                if agent not in self.blacklist and type(agent) is SlimeAgent:
-#                    print(agent)
-                    self.cluster_neighbors = agent.getSlimeNeighbors()
-#                    print(self.cluster_neighbors)
-                    self.cluster_agents.append(self.cluster_neighbors)
-                    self.blacklist.append(self.cluster_neighbors)
-                    self.cells += len(self.cluster_neighbors)
+    # Method to get every agent on the Von Neumann neighbors of pos (the agents grid.get_neighbors returns)
+    def getNeighbors(self, pos):
+        self.profiler.count("neighbors")
+        pop = self.population
+        order, starts = pop.getCellLists(self.width, self.height)
 
+        neighbors = list()
+        for cell in self.getNeighborCells(pos):
+            if self.cAMPs:
+                neighbors.append(self.cAMPs[cell])
+            for i in order[starts[cell]:starts[cell + 1]]:
+                neighbors.append(pop.getAgent(i))
+
+        # The DataVis agent right of the last simulated column (the last neighbor Mesa visits)
+        if pos[0] == self.width - 1 and pos[1] in self.rowDataVis:
+            neighbors.append(self.rowDataVis[pos[1]])
 
+        return neighbors
 
-#            if self.checkForCluster() :
-#                print("cluster: origin @ (", x, ", ", y, ")")
-            self.cluster_agents.clear()
-            self.cells = 0
+    # Method to get the population indices of the SlimeAgents on the Von Neumann neighbors of pos
+    def getSlimeNeighbors(self, pos):
+        self.profiler.count("neighbors")
+        return self.population.getAgentsOn(self.getNeighborCells(pos), self.width, self.height)
 
-        self.blacklist.clear()
+    # Method for getting the number of agents on every cell
+    def getOccupancy(self):
+        return self.occupancy
 
     # Step method
     def step(self):
-        cNeighbors = list()
-        neighbors = list()
-        lap = 0
-        amtSelf = 0
-        cAMPobj = cAMP
-        newDiag = 0
-        oldDiag = 0
-        nAgents = 0
-        layer = 1
-        secRate = 0
-
-        ''' Perform cAMP decay and diffusion actions '''
-        for (contents, x, y) in self.grid.coord_iter():
-
-            # This block is a bit messy but it works for now
-            cont = True
-            for content in contents:
-                # Set row amounts if an object is DataVis
-                if type(content) is DataVis or type(content) is NumDataVis:
-                    content.setRowAmt(self.getRowAmt(y))
-                    cont = False
-
-            if cont:
-                # Initialize number of agents for layer coloring
-                nAgents = len(contents) - 1
-                # Reset lap to 0
-                lap = 0
-
-                # Set cAMPobj to current tile's cAMP agent
-                cAMPobj = contents[0]
-                # Set neighbors to cAMPobj's neighbors (Von Neumann)
-                neighbors = cAMPobj.getNeighbors()
-                # Add cAMP objects form neighbors to cNeighbors
-                for neighbor in neighbors:
-                    if type(neighbor) is cAMP:
-                        cNeighbors.append(neighbor)
-
-                # Add sum of neighbors to lap
-                for mol in cNeighbors:
-                    lap += mol.getAmt()
-
-                amtSelf = cAMPobj.getAmt()
-                # Reassign lap to the laplacian (using previous neighbor sum value)
-                lap = (lap - 4 * amtSelf)/(self.Dh**2)
-                # Add decay to current cAMP object
-                cAMPobj.add((-cAMPobj.getDecayRate() * amtSelf + self.Dc * lap) * self.Dt)
-
-                # Wipe cNeighbors
-                cNeighbors.clear()
-
-                # Iterate through all contents of a grid cell
-                for agent in contents[1::]:
-                    # Get all neighbors (excuding self)
-                    neighbors = agent.getNeighbors()
-                    # Examine each neighbor
-                    for neighbor in neighbors:
-                        # Add cAMP neighbors to list
-                        if type(neighbor) is cAMP:
-                            cNeighbors.append(neighbor)
-
-                    # Add cAMP secretion to the cell that the agent shares with a cAMP object
-                    cAMPobj.add(agent.getSecRate() * self.Dt)
-                    # Decide whether or not to move
-                    newx = (x + random.randint(-1, 2)) % self.w
-                    newy = (y + random.randint(-1, 2)) % self.w
-
-                    # Calculate differences
-                    newDiag = ((self.grid[newx-1][newy-1])[0]).getAmt()
-                    diff = ((self.grid[x-1][y-1])[0]).getAmt()
-
-                    # Fix if there are crazy values for diff
-                    if diff > 10:
-                        diff = 10
-                    elif diff < -10:
-                        diff = -10
-
-                    # Decide to move
-                    if random.random() < np.exp(diff) / (1 + np.exp(diff)):
-                        agent.move(tuple([newx, newy]))
-
-                    # Layers for coloring agents based on density
-                    agent.addLayer()
-                    layer = agent.getLayer()
-                    # Only change color of agent that is on top of a stack
-                    self.pickColor(agent, nAgents)
-
-                    # Wipe cNeighbors
-                    cNeighbors.clear()
-
-                    self.sweepForClusters()
+        pop = self.population
+        profiler = self.profiler
+        profiler.beginStep()
+
+        # Mark shared state as being updated
+        if self.shared is not None:
+            self.state[0] += 1
+
+        if self.tiles > 1:
+            with profiler.phase("tiles"):
+                # Start the tile workers on the first step
+                if self.stepper is None:
+                    self.stepper = TiledStepper(self, self.tiles, self.tileSeed)
+
+                ''' Perform cAMP decay, diffusion and secretion and decide moves tile by tile in parallel '''
+                newx, newy, accept = self.stepper.step(self.Dc, self.Dh, self.Dt, self.width, self.height)
+        else:
+            with profiler.phase("secretion"):
+                # Amount of cAMP secreted onto every cell during this step
+                secretion = pop.getSecretion(self.width, self.height, self.Dt)
+
+            with profiler.phase("diffusion"):
+                ''' Perform cAMP decay, diffusion and secretion actions for the whole grid '''
+                self.field.step(self.Dc, self.Dh, self.Dt, secretion)
+
+            with profiler.phase("movement"):
+                # Decide whether or not to move for all agents at once
+                newx, newy, accept = pop.proposeMoves(self.field.amounts, self.width, self.height, self.moveRng)
+
+        with profiler.phase("dataVis"):
+            # Compute row, column and total amounts once for DataVis and the datacollector
+            self.updateAmts()
+
+            # Set row amounts of DataVis and NumDataVis agents
+            for vis in self.dataVis:
+                vis.setRowAmt(self.getRowAmt(vis.getY()))
+
+        with profiler.phase("coloring"):
+            # Shade every agent by the number of agents on its cell
+            pop.pickShades(self.occupancy)
+
+        with profiler.phase("movement"):
+            # Move all agents that decided to move, updating the number of agents on every cell
+            pop.move(newx, newy, accept, self.occupancy)
+            # Layers (position in the stack on every cell)
+            pop.updateLayers(self.width, self.height)
+
+        with profiler.phase("clustering"):
+            # Sweep for clusters
+            self.sweepForClusters()
 
         # Add step to schedule
         self.schedule.step()
-        # Collect new data
-        self.datacollector.collect(self)
-
-    # Method to select a color based on the topmost agent
-    def pickColor(self, topAgent, nAgents):
-        shade = topAgent.getShades()
-        if nAgents == 1:
-            topAgent.setShade(shade[0])
-        elif nAgents == 2:
-            topAgent.setShade(shade[1])
-        elif nAgents == 3:
-            topAgent.setShade(shade[2])
-        elif nAgents == 4:
-            topAgent.setShade(shade[3])
-        elif nAgents == 5:
-            topAgent.setShade(shade[4])
-        elif nAgents == 6:
-            topAgent.setShade(shade[5])
-        elif nAgents == 7:
-            topAgent.setShade(shade[6])
-        elif nAgents == 8:
-            topAgent.setShade(shade[7])
-
-
-''' Server elements '''
-
-# Function for defining portayal
-def cAMP_portrayal(agent):
-    portrayal = dict()
-    amt = 0
-    if type(agent) is SlimeAgent:
-        # Dictionary for setting portrayal settings of SlimeAgent agent
-        portrayal = {"Shape": "circle", "w": 1, "h": 1, "Filled": "true", "Layer": 1, "r": .65}
-        # Setting x coordinate of agent in portrayal dict
-        portrayal["x"] = agent.getX()
-        # Setting y coordinate of agent in portrayal dict
-        portrayal["y"] = agent.getY()
-        # Setting agent color to red
-        portrayal["Color"] = agent.getShade()
-
-    elif type(agent) is cAMP:
-        # Dictionary for setting portrayal settings of cAMP agent
-        portrayal = {"Shape": "rect", "w": 1, "h": 1, "Filled": "true", "Layer": 0}
-        # Setting x coordinate of agent in portrayal dict
-        portrayal["x"] = agent.getX()
-        # Setting y coordinate of agent in portrayal dict
-        portrayal["y"] = agent.getY()
-        # Setting amount of cAMP to amt
-        amt = agent.getAmt()
-
-        # Change color to darker shade of gray with increased cAMP amount
-        if amt == 0:
-            portrayal["Color"] = "white"
-        elif amt < 1:
-            portrayal["Color"] = "#f5f5f5"
-        elif amt < 2:
-            portrayal["Color"] = "#e9e9e9"
-        elif amt < 3:
-            portrayal["Color"] = "#d9d9d9"
-        elif amt < 4:
-            portrayal["Color"] = "#cccccc"
-        elif amt < 5:
-            portrayal["Color"] = "#c1c1c1"
-        elif amt < 6:
-            portrayal["Color"] = "#b4b4b4"
-        elif amt < 7:
-            portrayal["Color"] = "#a3a3a3"
-        elif amt < 8:
-            portrayal["Color"] = "#949494"
-        elif amt < 9:
-            portrayal["Color"] = "#8a8a8a"
-        elif amt < 10:
-            portrayal["Color"] = "#787878"
-        elif amt < 11:
-            portrayal["Color"] = "#696969"
-        elif amt < 12:
-            portrayal["Color"] = "#5b5b5b"
-        elif amt < 13:
-            portrayal["Color"] = "#505050"
-        elif amt < 14:
-            portrayal["Color"] = "#464646"
-        elif amt < 15:
-            portrayal["Color"] = "#3c3c3c"
-        elif amt < 16:
-            portrayal["Color"] = "#313131"
-        elif amt < 17:
-            portrayal["Color"] = "#282828"
-        elif amt < 18:
-            portrayal["Color"] = "#1d1d1d"
-        elif amt < 19:
-            portrayal["Color"] = "#1515150"
-        elif amt < 20:
-            portrayal["Color"] = "#0c0c0c"
-        elif amt < 21:
-            portrayal["Color"] = "#090909"
+
+        with profiler.phase("output"):
+            # Publish the new state to shared memory readers
+            self.publishState()
+            # Record the new state to the trajectory store
+            self.recordTrajectory()
+
+        with profiler.phase("collection"):
+            # Collect new data
+            self.datacollector.collect(self)
+
+        with profiler.phase("output"):
+            # Save periodic checkpoint
+            if self.checkpointPath is not None and self.schedule.steps % self.checkpointInterval == 0:
+                self.checkpoint(self.checkpointPath)
+
+        with profiler.phase("observers"):
+            # Stream the new state to observers
+            self.observers.publish(self.schedule.steps)
+
+        profiler.endStep()
+
+    # Method to move the field buffers, occupancy and a state array into shared memory
+    def shareState(self):
+        self.shared = SharedArrays()
+        self.field.amounts = self.shared.share("field0", self.field.amounts)
+        self.field.next = self.shared.share("field1", self.field.next)
+        self.occupancy = self.shared.share("occupancy", self.occupancy)
+        # Update counter (odd while stepping), current field buffer and step number
+        self.state = self.shared.share("state", np.zeros(3, dtype=np.int64))
+        self.publishState()
+
+    # Method to get what other processes need to attach to the shared state (see shared.SharedModelView)
+    def getSharedSpecs(self):
+        return self.shared.getSpecs()
+
+    # Method to publish current field buffer and step number to shared memory readers
+    def publishState(self):
+        if self.shared is None:
+            return
+
+        self.state[1] = 0 if self.field.amounts is self.shared.arrays["field0"] else 1
+        self.state[2] = self.schedule.steps
+        # Even update counter marks a consistent state
+        self.state[0] += 2 - self.state[0] % 2
+
+    # Method to append the field and occupancy to the trajectory store
+    def recordTrajectory(self):
+        if self.trajectory is not None and self.schedule.steps % self.trajectoryInterval == 0:
+            self.trajectory.append(self.schedule.steps, self.field.amounts, self.occupancy)
+
+    # Method to save a checkpoint of the model to path (resume with checkpoint.loadCheckpoint)
+    def checkpoint(self, path):
+        # Make sure every recorded step is on disk before the checkpoint refers to it
+        if self.trajectory is not None:
+            self.trajectory.flush()
+
+        saveCheckpoint(self, path)
+
+    # Method to restore the state saved by checkpoint.saveCheckpoint
+    def restoreState(self, header, arrays):
+        np.copyto(self.field.amounts, arrays["field"])
+
+        # Replace the population, views are taken off the grid and placed again
+        if self.population.placed and self.grid is not None:
+            for view in self.population.views.values():
+                self.grid._remove_agent(view.pos, view)
+        self.population = SlimePopulation(self, arrays["x"], arrays["y"], 0, header["color"], self.params["compiled"])
+        self.population.secRate[:] = arrays["secRate"]
+        self.population.layer[:] = arrays["layer"]
+        self.population.shade[:] = arrays["shade"]
+        if self.views and self.grid is not None:
+            self.population.placeViews(self.grid)
+        np.copyto(self.occupancy, arrays["occupancy"])
+
+        # Counters and random number generators
+        self.j = header["j"]
+        self.schedule.steps = header["steps"]
+        self.schedule.time = header["time"]
+        self.tileSeed = header["tileSeed"]
+        self.seed = header["seed"]
+        self.initRng.bit_generator.state = header["rngs"]["init"]
+        self.noiseRng.bit_generator.state = header["rngs"]["noise"]
+        self.moveRng.bit_generator.state = header["rngs"]["move"]
+
+        # Collected data
+        if self.params["arrayCollector"]:
+            self.datacollector.restore(arrays["collectorSteps"], arrays["collectorTotals"], arrays["collectorClusters"],
+                                       arrays["collectorColAmts"], arrays["collectorRowAmts"])
         else:
-            portrayal["Color"] = "#000000"
-
-    elif type(agent) is DataVis:
-        portrayal = {"Shape": "rect", "w": 1, "h": 1, "Filled": "true", "Layer": 1}
-        portrayal["x"] = agent.getX()
-        portrayal["y"] = agent.getY()
-        portrayal["Color"] = agent.getColor()
-
-    elif type(agent) is NumDataVis:
-        portrayal = {"Shape": "rect", "w": 1.5, "h": 1, "Filled": "true", "Layer": 1}
-        portrayal["x"] = agent.getX()
-        portrayal["y"] = agent.getY()
-        portrayal["Color"] = "#ffffff"
-        portrayal["text"] = agent.getNum()
-        portrayal["text_color"] = "#000000"
-
-    return portrayal
-
-# Create list of datacollectors
-xCollectors = list()
-yCollectors = list()
-
-# Loop to create bars for bar graphs
-coord = 0
-for x in range(masterHeight):
-    xCollectors.append({"Label": ("x: " + str(coord)), "Color": "#85c6e7"})
-    coord += 1
-
-coord = 0
-for y in range(masterWidth):
-    yCollectors.append({"Label": ("y: " + str(coord)), "Color": "#85c6e7"})
-    coord += 1
-
-# Create a bar charts to represent column and row amounts of relative to grid
-#bar_chart_element_col = BarChartModule(xCollectors, canvas_width = 550)
-#bar_chart_element_row = BarChartModule(yCollectors, canvas_width = 550)
-
-# Create a chart to represent total amount of cAMP on the grid
-chart_element = ChartModule([{"Label":"Total Amount of cAMP", "Color":"#85c6e7"}])
-
-# Setting size of model
-model_params = {
-        "height": 200,
-        "width": 220,
-        "numAgents": UserSettableParameter("slider", "Number of Agents", 1, 1, 10, 1),
-        "gDense": UserSettableParameter("slider", "Density of Agents on Grid", .5, 0, 1, .1),
-        "kRate": UserSettableParameter("slider", "Rate of cAMP decay", 1, 0, 5, .5),
-        "dcDiffu": UserSettableParameter("slider", "Diffusion Constant of cAMP", .001, 0, .01, .001),
-        "dhRes": UserSettableParameter("slider", "Spatial Resolution for cAMP Simulation", .01, 0, .1, .01),
-        "dtRes": UserSettableParameter("slider", "Time Resolution for cAMP Simulation", .01, .01, .1, .01),
-        "secRate": UserSettableParameter("slider", "Rate of cAMP Secretion by an Agent", 1, 0, 15, 1),
-        "color": UserSettableParameter("choice", "Agent Color", value="Blue", choices=["Blue", "Red", "Green"])
-        }
-
-# Create grid for agents of size 550px x 550px, with 50 tiles along x and 50 along y
-canvas_element = CanvasGrid(cAMP_portrayal, masterWidth, masterHeight, 550, 550)
-
-
-# Creating ModularServer
-#server = ModularServer(SlimeModel, [canvas_element, bar_chart_element_col, bar_chart_element_row, chart_element], "Keller-Segel Slime Mold Aggregation Model", model_params)
-server = ModularServer(SlimeModel, [canvas_element, chart_element], "Keller-Segel Slime Mold Aggregation Model", model_params)
-# Launching Server
-server.launch()
+            for (i, name) in enumerate(header["collectorNames"]):
+                self.datacollector.model_vars[name] = arrays["collectorVar" + str(i)].tolist()
+
+        # Values derived from the restored state
+        self.updateAmts()
+        for vis in self.dataVis:
+            vis.setRowAmt(self.getRowAmt(vis.getY()))
+        self.sweepForClusters()
+        self.publishState()
+
+        # Continue recording the trajectory, dropping records made after the checkpoint
+        if header["trajectory"] is not None:
+            self.trajectory = TrajectoryStore(header["trajectory"], mode="a")
+            self.trajectory.truncate(self.schedule.steps)
+            self.trajectoryInterval = header["trajectoryInterval"]
+
+    # Method to stop the tile workers (they are started again on the next step), release shared memory,
+    #   close the trajectory store and end the observer queues
+    def close(self):
+        self.observers.close()
+
+        if self.stepper is not None:
+            self.stepper.close()
+            self.stepper = None
+
+        if self.shared is not None:
+            self.field.amounts = np.array(self.field.amounts)
+            self.field.next = np.array(self.field.next)
+            self.occupancy = np.array(self.occupancy)
+            self.state = None
+            self.shared.close()
+            self.shared = None
+
+        if self.trajectory is not None:
+            self.trajectory.close()
+            self.trajectory = None
+
+    # Method to select a color for agent i based on the number of agents on its cell
+    def pickColor(self, i, nAgents):
+        self.population.shade[i] = shadeTable[min(nAgents, len(shadeTable) - 1)]
@@ -0,0 +1,53 @@
+import numpy as np
+
+'''
+    Precomputed Von Neumann neighborhoods of a grid. The neighbors of every
+        cell (no wrap-around, same as the model's MultiGrid) are stored as a
+        CSR table over flat cell indices (x * height + y): the neighbors of
+        cell c are cells[starts[c]:starts[c + 1]], in the order
+        MultiGrid.get_neighbors visits them. The same table is kept as
+        plain tuples for queries of a single cell, where indexing a tuple is
+        cheaper than slicing an array.
+'''
+
+# Offsets of the Von Neumann neighbors, in the order Mesa visits them
+vonNeumannOffsets = ((-1, 0), (0, -1), (0, 1), (1, 0))
+
+class NeighborIndex:
+    def __init__(self, width, height):
+        # width of grid
+        self.width = width
+        # height of grid
+        self.height = height
+
+        x, y = np.divmod(np.arange(width * height), height)
+        dx = np.array([offset[0] for offset in vonNeumannOffsets])
+        dy = np.array([offset[1] for offset in vonNeumannOffsets])
+        nx = x[:, None] + dx
+        ny = y[:, None] + dy
+        inside = (nx >= 0) & (nx < width) & (ny >= 0) & (ny < height)
+
+        # Where the neighbors of every cell start in cells (one extra entry for the end of the last cell)
+        self.starts = np.zeros(width * height + 1, dtype=np.int64)
+        np.cumsum(inside.sum(axis=1), out=self.starts[1:])
+        # Flat index of the neighbors of every cell, cell by cell
+        self.cells = (nx * height + ny)[inside]
+        # Neighbors of every cell as tuples of flat indices (built on the first single cell query)
+        self.lists = None
+
+    # Get flat index of a position
+    def getCell(self, pos):
+        return pos[0] * self.height + pos[1]
+
+    # Get flat indices of the neighbors of a position
+    def getNeighborCells(self, pos):
+        if self.lists is None:
+            cells = self.cells.tolist()
+            starts = self.starts.tolist()
+            self.lists = tuple(tuple(cells[starts[cell]:starts[cell + 1]]) for cell in range(len(starts) - 1))
+
+        return self.lists[pos[0] * self.height + pos[1]]
+
+    # Get the neighbors of a position as (x, y) tuples
+    def getNeighborPositions(self, pos):
+        return [(int(cell // self.height), int(cell % self.height)) for cell in self.getNeighborCells(pos)]
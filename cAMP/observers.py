@@ -0,0 +1,252 @@
+import collections
+import threading
+
+import numpy as np
+
+'''
+    Streaming observers of SlimeModel. Consumers subscribe to the topics of
+        a step they need and receive one StepEvent every interval steps,
+        without the model keeping any history and without patching step:
+
+        field       cAMP field ([x, y] array)
+        occupancy   number of agents on every cell ([x, y] array)
+        agents      arrays of the population: x, y, shade, layer
+        clusters    clusters.Clusters of the last sweep (None before the first step)
+        totals      total amount of cAMP and its amount in every column and row
+
+    Events reach consumers in three ways:
+        model.observers.subscribe(callback, topics, interval)
+            callback(event) is called at the end of every interval-th step.
+        streamEvents(model, steps, topics, interval)
+            a generator that steps the model only as far as needed for the
+            next event, so the consumer sets the pace.
+        model.observers.subscribeQueue(topics, interval, maxsize, policy)
+            a bounded queue for a consumer running in another thread. When
+            it is full the model waits (policy "block") or an event is
+            dropped ("dropNewest", "dropOldest").
+
+    Arrays of events are read-only views of the model's arrays, valid until
+        the model steps again, unless the subscription copies them
+        (copy=True, always the case for queues).
+
+    Example:
+        peaks = list()
+        model.observers.subscribe(lambda event: peaks.append(event["field"].max()), ["field"], interval=10)
+'''
+
+# Every topic of a step event
+allTopics = ("field", "occupancy", "agents", "clusters", "totals")
+
+# Read-only view of an array
+def readOnly(array):
+    view = array.view()
+    view.flags.writeable = False
+
+    return view
+
+
+# Data of the requested topics of one step
+class StepEvent:
+    def __init__(self, step, data):
+        # Step the data belongs to
+        self.step = step
+        # Topic -> data
+        self.data = data
+
+    def __getitem__(self, topic):
+        return self.data[topic]
+
+    def __contains__(self, topic):
+        return topic in self.data
+
+    # Get the topics of the event
+    def getTopics(self):
+        return list(self.data)
+
+    # Get an event with copies of every array (safe to keep after the model steps)
+    def copy(self):
+        copyData = lambda data: {name: copyData(value) for (name, value) in data.items()} if isinstance(data, dict) \
+            else np.array(data) if isinstance(data, np.ndarray) else data
+
+        return StepEvent(self.step, copyData(self.data))
+
+
+# Subscription calling a callback with the events of every interval-th step
+class Subscription:
+    def __init__(self, callback, topics=allTopics, interval=1, copy=False):
+        for topic in topics:
+            if topic not in allTopics:
+                raise ValueError("unknown topic " + repr(topic) + " (topics are " + ", ".join(allTopics) + ")")
+
+        # Function receiving the events
+        self.callback = callback
+        # Topics of the events
+        self.topics = tuple(topics)
+        # Deliver every this many steps
+        self.interval = interval
+        # Whether events hold copies instead of views
+        self.copy = copy
+        # Number of delivered events
+        self.delivered = 0
+
+    # Whether the subscription wants the event of a step
+    def isDue(self, step):
+        return step % self.interval == 0
+
+    # Hand an event to the consumer
+    def deliver(self, event):
+        self.callback(event)
+        self.delivered += 1
+
+
+# Subscription putting events into a bounded queue, read by iterating over the subscription
+class QueueSubscription(Subscription):
+    policies = ("block", "dropNewest", "dropOldest")
+
+    def __init__(self, topics=allTopics, interval=1, maxsize=16, policy="block"):
+        if policy not in self.policies:
+            raise ValueError("unknown policy " + repr(policy) + " (policies are " + ", ".join(self.policies) + ")")
+
+        super().__init__(None, topics, interval, copy=True)
+        # What to do when the queue is full
+        self.policy = policy
+        # Number of events the queue holds
+        self.maxsize = maxsize
+        # Events not read yet
+        self.events = collections.deque()
+        # Guards the queue, notified when an event is put, read or the subscription is closed
+        self.condition = threading.Condition()
+        # Number of events dropped because the queue was full
+        self.dropped = 0
+        # Whether no more events will be put into the queue
+        self.closed = False
+
+    def deliver(self, event):
+        with self.condition:
+            if self.policy == "block":
+                # Wait until the consumer makes room (or stops reading)
+                while len(self.events) >= self.maxsize and not self.closed:
+                    self.condition.wait()
+            elif len(self.events) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == "dropNewest":
+                    return
+                self.events.popleft()
+
+            if self.closed:
+                return
+            self.events.append(event)
+            self.delivered += 1
+            self.condition.notify_all()
+
+    # Stop the events (iteration ends once the queued events are read)
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    # Get the queued events until the subscription is closed
+    def __iter__(self):
+        while True:
+            with self.condition:
+                while len(self.events) == 0 and not self.closed:
+                    self.condition.wait()
+                if len(self.events) == 0:
+                    return
+                event = self.events.popleft()
+                self.condition.notify_all()
+            yield event
+
+
+class ObserverHub:
+    def __init__(self, model):
+        # Model the events come from
+        self.model = model
+        # Active subscriptions
+        self.subscriptions = list()
+
+    # Subscribe a callback to the topics of every interval-th step (current delivers the current state right away)
+    def subscribe(self, callback, topics=allTopics, interval=1, copy=False, current=False):
+        return self.add(Subscription(callback, topics, interval, copy), current)
+
+    # Subscribe a bounded queue to the topics of every interval-th step, iterate over it to read the events
+    def subscribeQueue(self, topics=allTopics, interval=1, maxsize=16, policy="block", current=False):
+        return self.add(QueueSubscription(topics, interval, maxsize, policy), current)
+
+    # Add a subscription
+    def add(self, subscription, current=False):
+        self.subscriptions.append(subscription)
+        if current:
+            step = self.model.schedule.steps
+            subscription.deliver(self.makeEvent(step, subscription.topics, subscription.copy))
+
+        return subscription
+
+    # Remove a subscription (a queue subscription is closed)
+    def unsubscribe(self, subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+        if isinstance(subscription, QueueSubscription):
+            subscription.close()
+
+    # Remove every subscription
+    def close(self):
+        for subscription in list(self.subscriptions):
+            self.unsubscribe(subscription)
+
+    # Get the data of the topics of the current state of the model
+    def makeEvent(self, step, topics, copy=False):
+        model = self.model
+        pop = model.population
+        data = dict()
+        if "field" in topics:
+            data["field"] = readOnly(model.field.amounts)
+        if "occupancy" in topics:
+            data["occupancy"] = readOnly(model.occupancy)
+        if "agents" in topics:
+            data["agents"] = {"x": readOnly(pop.x), "y": readOnly(pop.y), "shade": readOnly(pop.shade),
+                              "layer": readOnly(pop.layer)}
+        if "clusters" in topics:
+            data["clusters"] = model.clusters
+        if "totals" in topics:
+            data["totals"] = {"total": model.totalAmt, "colAmts": readOnly(model.colAmts),
+                              "rowAmts": readOnly(model.rowAmts)}
+
+        event = StepEvent(step, data)
+        if copy:
+            return event.copy()
+
+        return event
+
+    # Deliver the event of a step to every subscription that wants it
+    def publish(self, step):
+        due = [subscription for subscription in self.subscriptions if subscription.isDue(step)]
+        if len(due) == 0:
+            return
+
+        # One event with every topic asked for, copied once if any subscription keeps it
+        topics = set(topic for subscription in due for topic in subscription.topics)
+        event = self.makeEvent(step, topics)
+        copied = None
+        for subscription in due:
+            if subscription.copy and copied is None:
+                copied = event.copy()
+            shared = copied if subscription.copy else event
+            subscription.deliver(StepEvent(step, {topic: shared[topic] for topic in subscription.topics}))
+
+
+# Step a model up to steps more times, yielding the event of every interval-th step (the current state first
+#   if it is on the interval). The model only steps when the next event is asked for.
+def streamEvents(model, steps, topics=allTopics, interval=1, copy=False):
+    pending = collections.deque()
+    subscription = model.observers.subscribe(pending.append, topics, interval, copy,
+                                             current=model.schedule.steps % interval == 0)
+    try:
+        for i in range(steps):
+            while pending:
+                yield pending.popleft()
+            model.step()
+        while pending:
+            yield pending.popleft()
+    finally:
+        model.observers.unsubscribe(subscription)
@@ -0,0 +1,40 @@
+import numpy as np
+from colour import Color
+
+'''
+    Color lookup tables for portrayal. A value (amount of cAMP on a cell,
+        amount of cAMP in a row) is mapped to a bucket index with one array
+        operation, and the bucket index to a hex color with one table lookup,
+        instead of a chain of comparisons per value.
+'''
+
+# Gray of a cell by amount of cAMP: 0, then one bucket per unit below 21, then 21 and more
+grayShades = ["white", "#f5f5f5", "#e9e9e9", "#d9d9d9", "#cccccc", "#c1c1c1", "#b4b4b4", "#a3a3a3",
+              "#949494", "#8a8a8a", "#787878", "#696969", "#5b5b5b", "#505050", "#464646", "#3c3c3c",
+              "#313131", "#282828", "#1d1d1d", "#1515150", "#0c0c0c", "#090909", "#000000"]
+
+# Saturation of the DataVis blue by amount of cAMP in a row, one bucket per unit below 27
+dataVisSaturations = [0.027, 0.054, 0.081, 0.108, 0.135, 0.162, 0.189, 0.216, 0.143, 0.27, 0.297, 0.324, 0.351,
+                      0.378, 0.405, 0.432, 0.459, 0.486, 0.513, 0.540, 0.567, 0.594, 0.621, 0.648, 0.675, 0.702,
+                      0.729]
+
+# DataVis color of every bucket (rows with 27 or more are black)
+dataVisColors = [Color("blue", saturation=saturation).hex_l for saturation in dataVisSaturations] + ["#000000"]
+
+# Gray bucket of every amount of cAMP (index into grayShades)
+def grayBuckets(amounts):
+    buckets = np.clip(np.floor(amounts), 0, len(grayShades) - 2).astype(np.int8) + 1
+    buckets[amounts == 0] = 0
+
+    return buckets
+
+# Gray bucket of a single amount of cAMP
+def grayBucket(amt):
+    if amt == 0:
+        return 0
+
+    return int(min(max(amt, 0), len(grayShades) - 2)) + 1
+
+# DataVis bucket of an amount of cAMP in a row (index into dataVisColors)
+def dataVisBucket(rowAmt):
+    return int(min(max(rowAmt, 0), len(dataVisColors) - 1))
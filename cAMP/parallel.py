@@ -0,0 +1,178 @@
+import multiprocessing
+
+import numpy as np
+
+from field import cAMPField
+from population import proposeMoves
+from shared import SharedArrays, attachShared
+
+'''
+    Domain-decomposed stepping for large grids. The grid is split along x into
+        tiles, one per worker process. The two cAMP buffers and the agent
+        arrays live in shared memory. Every step each worker copies its tile
+        plus one ghost row on each side (the halo) out of the current buffer,
+        updates the tile with its own cAMPField, writes it into the next
+        buffer and, once every tile is written, proposes moves for the agents
+        on its tile. Tiles own agents by position, so an agent that crosses a
+        tile boundary is handed to the neighboring worker on the next step.
+        Accepted moves are applied by the model in one batch. The random
+        stream of a tile is derived from (seed, tile, step), so a run resumed
+        from a checkpoint draws the same numbers.
+'''
+
+# Loop run by every worker process, steps the tile x0 <= x < x1 on every command
+def tileWorker(tile, x0, x1, specs, decay, compiled, seed, commands, done, barrier):
+    blocks = list()
+    arrays = dict()
+    for (name, (blockName, shape, dtype)) in specs.items():
+        block, arrays[name] = attachShared(blockName, shape, dtype)
+        blocks.append(block)
+
+    width, height = arrays["field0"].shape
+
+    # Field of the tile with one halo row on each side (halo rows are never updated)
+    local = cAMPField(x1 - x0 + 2, height, decay, compiled)
+    local.active[...] = False
+    local.active[1:-1] = True
+    # Rows of the grid copied into the local field
+    lo = max(x0 - 1, 0)
+    hi = min(x1 + 1, width)
+
+    while True:
+        command = commands.get()
+        if command is None:
+            break
+
+        try:
+            (step, current, Dc, Dh, Dt, moveWidth, moveHeight) = command
+            rng = np.random.default_rng([seed, tile, step])
+            amounts = arrays["field" + str(current)]
+            new = arrays["field" + str(1 - current)]
+            x = arrays["x"]
+            y = arrays["y"]
+
+            # Agents on this tile
+            owned = np.flatnonzero((x >= x0) & (x < x1))
+
+            # Halo exchange: copy the tile and its ghost rows out of the current buffer
+            local.amounts.fill(0)
+            local.amounts[lo - x0 + 1:hi - x0 + 1] = amounts[lo:hi]
+
+            # Secretion of the agents on this tile
+            cells = (x[owned] - x0 + 1).astype(np.int64) * height + y[owned]
+            secretion = np.bincount(cells, weights=arrays["secRate"][owned] * Dt, minlength=local.width * height)
+            local.step(Dc, Dh, Dt, secretion.reshape(local.width, height))
+            new[x0:x1] = local.amounts[1:-1]
+
+            # Wait until every tile is written before reading the new field
+            barrier.wait()
+
+            newx, newy, accept = proposeMoves(x[owned], y[owned], new, moveWidth, moveHeight, rng, compiled)
+            arrays["newx"][owned] = newx
+            arrays["newy"][owned] = newy
+            arrays["accept"][owned] = accept
+
+            done.put(len(owned))
+        except Exception as error:
+            # Release the other workers and report the error to the model
+            barrier.abort()
+            done.put(error)
+
+    for block in blocks:
+        block.close()
+
+
+class TiledStepper:
+    def __init__(self, model, tiles, seed):
+        field = model.field
+        pop = model.population
+        if tiles < 1 or tiles > field.width:
+            raise ValueError("number of tiles must be between 1 and the grid width")
+
+        self.model = model
+        self.tiles = tiles
+
+        # Arrays moved into shared memory by the stepper
+        self.shared = SharedArrays()
+
+        if model.shared is not None:
+            # Field buffers are already in shared memory
+            self.buffers = [model.shared.arrays["field0"], model.shared.arrays["field1"]]
+            specs = model.shared.getSpecs()
+            fieldSpecs = {"field0": specs["field0"], "field1": specs["field1"]}
+        else:
+            # Move field buffers into shared memory
+            self.buffers = [self.shared.share("field0", field.amounts), self.shared.share("field1", field.next)]
+            field.amounts, field.next = self.buffers
+            fieldSpecs = dict()
+
+        # Move agent arrays into shared memory
+        pop.x = self.shared.share("x", pop.x)
+        pop.y = self.shared.share("y", pop.y)
+        pop.secRate = self.shared.share("secRate", pop.secRate)
+
+        # Move proposals written by the workers
+        self.newx = self.shared.share("newx", np.zeros(len(pop), dtype=np.int32))
+        self.newy = self.shared.share("newy", np.zeros(len(pop), dtype=np.int32))
+        self.accept = self.shared.share("accept", np.zeros(len(pop), dtype=bool))
+
+        # (block name, shape, dtype) of every array the workers attach to
+        self.specs = self.shared.getSpecs()
+        self.specs.update(fieldSpecs)
+
+        # Tile boundaries along x
+        bounds = np.linspace(0, field.width, tiles + 1).astype(int)
+
+        self.barrier = multiprocessing.Barrier(tiles)
+        self.done = multiprocessing.Queue()
+        self.commands = list()
+        self.workers = list()
+        for i in range(tiles):
+            commands = multiprocessing.Queue()
+            worker = multiprocessing.Process(target=tileWorker, daemon=True,
+                                             args=(i, bounds[i], bounds[i + 1], self.specs, field.decay,
+                                                   field.compiled, seed, commands, self.done, self.barrier))
+            worker.start()
+            self.commands.append(commands)
+            self.workers.append(worker)
+
+    # Update the field and propose moves for every tile in parallel, returns the move proposals
+    def step(self, Dc, Dh, Dt, width, height):
+        current = 0 if self.model.field.amounts is self.buffers[0] else 1
+        for commands in self.commands:
+            commands.put((self.model.schedule.steps, current, Dc, Dh, Dt, width, height))
+
+        errors = list()
+        for i in range(self.tiles):
+            result = self.done.get()
+            if isinstance(result, Exception):
+                errors.append(result)
+
+        if errors:
+            # Failed workers aborted the barrier, it has to be reset before the next step
+            self.barrier.reset()
+            raise errors[0]
+
+        self.model.field.swap()
+
+        return self.newx, self.newy, self.accept
+
+    # Stop the workers and move the arrays back into private memory
+    def close(self):
+        for commands in self.commands:
+            commands.put(None)
+        for worker in self.workers:
+            worker.join()
+
+        field = self.model.field
+        pop = self.model.population
+        if "field0" in self.shared.arrays:
+            field.amounts = np.array(field.amounts)
+            field.next = np.array(field.next)
+        pop.x = np.array(pop.x)
+        pop.y = np.array(pop.y)
+        pop.secRate = np.array(pop.secRate)
+
+        self.buffers = list()
+        self.newx = self.newy = self.accept = None
+        self.shared.close()
@@ -0,0 +1,181 @@
+import numpy as np
+
+import kernels
+from agents import SlimeAgent
+
+'''
+    Structure-of-arrays population of slime mold agents. Positions, secretion
+        rates, layers and shades of all agents live in contiguous NumPy arrays,
+        so moving and secreting is done for the whole population at once.
+        SlimeAgent objects are only created as views when they are needed for
+        portrayal.
+'''
+
+# Shade index for every number of agents on a cell (index 0 is an empty cell, stacks of 8+ share the last shade)
+shadeTable = np.array([0, 0, 1, 2, 3, 4, 5, 6, 7], dtype=np.int8)
+
+# Propose a move for the agents at x, y and decide whether it is taken, using one batch of random draws
+def proposeMoves(x, y, amounts, width, height, rng, compiled=False):
+    n = len(x)
+    # Offsets of -1 to 2 along x and y (same range as random.randint(-1, 2))
+    offsets = rng.integers(-1, 3, size=(2, n))
+    uniforms = rng.random(n)
+
+    if compiled:
+        newx = np.empty(n, dtype=np.int32)
+        newy = np.empty(n, dtype=np.int32)
+        accept = np.empty(n, dtype=bool)
+        kernels.moveKernel(x, y, offsets, uniforms, amounts, width, height, newx, newy, accept)
+        return newx, newy, accept
+
+    newx = ((x + offsets[0]) % width).astype(np.int32)
+    newy = ((y + offsets[1]) % height).astype(np.int32)
+
+    # Amount of cAMP used for the logistic move probability, limited to [-10, 10]
+    diff = np.clip(amounts[x - 1, y - 1], -10, 10)
+    accept = uniforms < np.exp(diff) / (1 + np.exp(diff))
+
+    return newx, newy, accept
+
+
+class SlimePopulation:
+    def __init__(self, model, xs, ys, secRate, color, compiled=False):
+        # Model the population belongs to
+        self.model = model
+        # Agent color (string colorname) shared by every agent
+        self.color = color
+        # Whether to use the compiled move kernel (only if Numba is installed)
+        self.compiled = compiled and kernels.numbaAvailable
+
+        # Coordinates of every agent
+        self.x = np.array(xs, dtype=np.int32)
+        self.y = np.array(ys, dtype=np.int32)
+        # Secretion rate of every agent
+        self.secRate = np.full(len(self.x), secRate, dtype=np.float64)
+        # Layer of every agent
+        self.layer = np.ones(len(self.x), dtype=np.int32)
+        # Index into the shades of the population color for every agent
+        self.shade = np.zeros(len(self.x), dtype=np.int8)
+
+        # SlimeAgent views by index (created on demand)
+        self.views = dict()
+        # Whether the views of every agent are placed on the grid (kept in sync as agents move)
+        self.placed = False
+        # Agent indices sorted by cell and where every cell starts among them (rebuilt after agents move)
+        self.cellIndex = None
+        # The same as lists, for queries of single cells
+        self.cellLists = None
+
+    # Number of agents
+    def __len__(self):
+        return len(self.x)
+
+    # Get a SlimeAgent view of the agent at index i
+    def getAgent(self, i):
+        i = int(i)
+        if i not in self.views:
+            self.views[i] = SlimeAgent(self.model, i, self, i)
+
+        return self.views[i]
+
+    # Create a view of every agent and place it onto the grid
+    def placeViews(self, grid):
+        for i in range(len(self)):
+            grid._place_agent((int(self.x[i]), int(self.y[i])), self.getAgent(i))
+        self.placed = True
+
+    # Flat cell index of every agent for a grid of the given height
+    def getCells(self, height):
+        return self.x.astype(np.int64) * height + self.y
+
+    # Number of agents on every cell
+    def getCounts(self, width, height):
+        counts = np.bincount(self.getCells(height), minlength=width * height)
+
+        return counts.reshape(width, height)
+
+    # Get agent indices sorted by cell and where every cell starts among them
+    def getCellIndex(self, width, height):
+        if self.cellIndex is None:
+            cells = self.getCells(height)
+            order = np.argsort(cells, kind="stable")
+            starts = np.zeros(width * height + 1, dtype=np.int64)
+            np.cumsum(np.bincount(cells, minlength=width * height), out=starts[1:])
+            self.cellIndex = (order, starts)
+
+        return self.cellIndex
+
+    # Get the cell index as lists
+    def getCellLists(self, width, height):
+        if self.cellLists is None:
+            order, starts = self.getCellIndex(width, height)
+            self.cellLists = (order.tolist(), starts.tolist())
+
+        return self.cellLists
+
+    # Get indices of the agents on the given flat cells
+    def getAgentsOn(self, cells, width, height):
+        order, starts = self.getCellLists(width, height)
+        agents = list()
+        for cell in cells:
+            agents.extend(order[starts[cell]:starts[cell + 1]])
+
+        return agents
+
+    # Forget the cell index once agents moved
+    def invalidateCells(self):
+        self.cellIndex = None
+        self.cellLists = None
+
+    # Set position of agent i, keeping the model's number of agents on every cell up to date
+    def setPosition(self, i, x, y):
+        counts = self.model.occupancy
+        counts[self.x[i], self.y[i]] -= 1
+        counts[x, y] += 1
+
+        self.x[i] = x
+        self.y[i] = y
+        self.invalidateCells()
+
+    # Amount of cAMP secreted onto every cell in one time step of length Dt
+    def getSecretion(self, width, height, Dt):
+        secretion = np.bincount(self.getCells(height), weights=self.secRate * Dt, minlength=width * height)
+
+        return secretion.reshape(width, height)
+
+    # Propose a move for every agent and decide whether it is taken, using one batch of random draws
+    def proposeMoves(self, amounts, width, height, rng):
+        return proposeMoves(self.x, self.y, amounts, width, height, rng, self.compiled)
+
+    # Move every agent whose move was accepted to its proposed position, keeping counts (agents per cell) up to date
+    def move(self, newx, newy, accept, counts=None):
+        moved = np.flatnonzero(accept & ((newx != self.x) | (newy != self.y)))
+
+        if counts is not None:
+            np.subtract.at(counts, (self.x[moved], self.y[moved]), 1)
+            np.add.at(counts, (newx[moved], newy[moved]), 1)
+
+        # Keep views on the grid in sync with the arrays
+        if self.placed:
+            grid = self.model.grid
+            for i in moved:
+                view = self.getAgent(i)
+                grid._remove_agent(view.pos, view)
+                grid._place_agent((int(newx[i]), int(newy[i])), view)
+
+        self.x[moved] = newx[moved]
+        self.y[moved] = newy[moved]
+        if len(moved) > 0:
+            self.invalidateCells()
+
+        return moved
+
+    # Set the shade of every agent from the number of agents on its cell
+    def pickShades(self, counts):
+        self.shade[:] = shadeTable[np.minimum(counts[self.x, self.y], len(shadeTable) - 1)]
+
+    # Set the layer of every agent to its position in the stack on its cell (1 is the bottom)
+    def updateLayers(self, width, height):
+        order, starts = self.getCellIndex(width, height)
+        cells = self.getCells(height)[order]
+        self.layer[order] = np.arange(len(order)) - starts[cells] + 1
@@ -0,0 +1,147 @@
+import time
+
+'''
+    Timing of the phases of SlimeModel.step. Every phase (diffusion,
+        secretion, movement, coloring, clustering, collection, portrayal, ...)
+        is timed with a reusable context manager and counted operations
+        (neighbor queries) are tallied, both for the current step
+        and over the whole run. A model built with profile=False gets a
+        NullProfiler, whose phases and counters do nothing.
+
+    Example:
+        model = SlimeModel(..., profile=True)
+        for i in range(100):
+            model.step()
+        print(model.profiler.report())
+'''
+
+# Context manager adding the time spent inside it to one phase of a profiler
+class PhaseTimer:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.addTime(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StepProfiler:
+    def __init__(self):
+        # Number of completed steps
+        self.steps = 0
+        # Phase -> seconds spent in the current (or last completed) step
+        self.stepTimes = dict()
+        # Phase -> seconds spent over all steps
+        self.totalTimes = dict()
+        # Operation -> number of calls in the current (or last completed) step
+        self.stepCounts = dict()
+        # Operation -> number of calls over all steps
+        self.totalCounts = dict()
+        # Phase -> reusable timer
+        self.timers = dict()
+
+    # Get the context manager timing a phase
+    def phase(self, name):
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = PhaseTimer(self, name)
+
+        return timer
+
+    # Add seconds to a phase
+    def addTime(self, name, seconds):
+        self.stepTimes[name] = self.stepTimes.get(name, 0) + seconds
+        self.totalTimes[name] = self.totalTimes.get(name, 0) + seconds
+
+    # Count calls of an operation
+    def count(self, name, calls=1):
+        self.stepCounts[name] = self.stepCounts.get(name, 0) + calls
+        self.totalCounts[name] = self.totalCounts.get(name, 0) + calls
+
+    # Start a new step (work done between steps, e.g. portrayal, stays with the step before)
+    def beginStep(self):
+        self.stepTimes = dict()
+        self.stepCounts = dict()
+
+    # Finish the current step
+    def endStep(self):
+        self.steps += 1
+
+    # Get seconds spent in every phase of the last step
+    def getStep(self):
+        return dict(self.stepTimes)
+
+    # Get seconds spent in every phase over all steps
+    def getTotals(self):
+        return dict(self.totalTimes)
+
+    # Get calls of every counted operation in the last step and over all steps
+    def getCounts(self):
+        return dict(self.stepCounts), dict(self.totalCounts)
+
+    # Get the timings as a text table (last step, total, mean per step and share of the total)
+    def report(self):
+        total = sum(self.totalTimes.values())
+        steps = max(self.steps, 1)
+
+        lines = ["%-12s %12s %12s %12s %7s" % ("phase", "step (ms)", "total (s)", "mean (ms)", "share")]
+        for (name, seconds) in sorted(self.totalTimes.items(), key=lambda item: -item[1]):
+            share = seconds / total * 100 if total > 0 else 0
+            lines.append("%-12s %12.3f %12.3f %12.3f %6.1f%%" % (name, self.stepTimes.get(name, 0) * 1000, seconds,
+                                                                  seconds / steps * 1000, share))
+        lines.append("%-12s %12.3f %12.3f %12.3f" % ("all", sum(self.stepTimes.values()) * 1000, total, total / steps * 1000))
+
+        if self.totalCounts:
+            lines.append("")
+            lines.append("%-12s %12s %12s" % ("operation", "step", "total"))
+            for (name, calls) in sorted(self.totalCounts.items()):
+                lines.append("%-12s %12d %12d" % (name, self.stepCounts.get(name, 0), calls))
+
+        return "\n".join(lines)
+
+
+# Context manager that does nothing
+class NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+# Profiler used when profiling is disabled, every method does nothing
+class NullProfiler:
+    timer = NullPhase()
+
+    def phase(self, name):
+        return self.timer
+
+    def addTime(self, name, seconds):
+        pass
+
+    def count(self, name, calls=1):
+        pass
+
+    def beginStep(self):
+        pass
+
+    def endStep(self):
+        pass
+
+    def getStep(self):
+        return dict()
+
+    def getTotals(self):
+        return dict()
+
+    def getCounts(self):
+        return dict(), dict()
+
+    def report(self):
+        return "profiling is disabled (build the model with profile=True)"
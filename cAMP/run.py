@@ -0,0 +1,4 @@
+from server import server
+
+# Launching Server
+server.launch()
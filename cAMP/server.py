@@ -0,0 +1,191 @@
+from mesa.visualization.modules import CanvasGrid
+from mesa.visualization.UserParam import UserSettableParameter
+
+import numpy as np
+
+from agents import SlimeAgent, cAMP, DataVis, NumDataVis, slimeShades
+from palette import grayShades, grayBucket
+from model import SlimeModel
+from deltaviz import DeltaCanvasGrid, getAgentRaster, getBlockShape, getDataVis, getFieldRaster
+from framing import FrameServer, StepChartModule
+
+''' Server elements '''
+
+# Dimensions of the served grid (the canvas is sized once, so they are fixed for the server)
+gridWidth = 15
+gridHeight = 15
+# Show the amount of cAMP in every row (DataVis and NumDataVis columns right of the grid)
+showDataVis = False
+# Send the canvas as delta-encoded frames (deltaviz.DeltaCanvasGrid) instead of one portrayal dict per cell and agent
+deltaFrames = False
+# Send the rasters of delta-encoded frames zlib-compressed
+compressFrames = False
+# Number of model steps per rendered frame (the chart still gets every step)
+stepsPerFrame = 1
+# Side of the blocks of cells drawn as one cell (the mean cAMP of the block), for large grids
+renderBlock = 1
+
+# Function for defining portayal
+def cAMP_portrayal(agent):
+    portrayal = dict()
+    amt = 0
+    if type(agent) is SlimeAgent:
+        # Dictionary for setting portrayal settings of SlimeAgent agent
+        portrayal = {"Shape": "circle", "w": 1, "h": 1, "Filled": "true", "Layer": 1, "r": .65}
+        # Setting x coordinate of agent in portrayal dict
+        portrayal["x"] = agent.getX()
+        # Setting y coordinate of agent in portrayal dict
+        portrayal["y"] = agent.getY()
+        # Setting agent color to red
+        portrayal["Color"] = agent.getShade()
+
+    elif type(agent) is cAMP:
+        # Dictionary for setting portrayal settings of cAMP agent
+        portrayal = {"Shape": "rect", "w": 1, "h": 1, "Filled": "true", "Layer": 0}
+        # Setting x coordinate of agent in portrayal dict
+        portrayal["x"] = agent.getX()
+        # Setting y coordinate of agent in portrayal dict
+        portrayal["y"] = agent.getY()
+        # Setting amount of cAMP to amt
+        amt = agent.getAmt()
+
+        # Change color to darker shade of gray with increased cAMP amount
+        portrayal["Color"] = grayShades[grayBucket(amt)]
+
+    elif type(agent) is DataVis:
+        portrayal = {"Shape": "rect", "w": 1, "h": 1, "Filled": "true", "Layer": 1}
+        portrayal["x"] = agent.getX()
+        portrayal["y"] = agent.getY()
+        portrayal["Color"] = agent.getColor()
+
+    elif type(agent) is NumDataVis:
+        portrayal = {"Shape": "rect", "w": 1.5, "h": 1, "Filled": "true", "Layer": 1}
+        portrayal["x"] = agent.getX()
+        portrayal["y"] = agent.getY()
+        portrayal["Color"] = "#ffffff"
+        portrayal["text"] = agent.getNum()
+        portrayal["text_color"] = "#000000"
+
+    return portrayal
+
+# Canvas drawn straight from the model's arrays (no cAMP or SlimeAgent views needed). The whole field is
+#   mapped to gray buckets once per frame and only cells whose bucket changed get a new color. With block > 1
+#   every block of block x block cells is drawn as one cell, with the mean cAMP of the block and one agent
+#   shaded by the number of agents in the block.
+class FieldCanvasGrid(CanvasGrid):
+    def __init__(self, grid_width, grid_height, canvas_width=500, canvas_height=500, block=1, dataVisColumns=0):
+        super().__init__(cAMP_portrayal, -(-grid_width // block) + dataVisColumns, -(-grid_height // block),
+                         canvas_width, canvas_height)
+        # Side of the blocks of cells drawn as one cell
+        self.block = block
+        # Model the cached portrayals belong to
+        self.model = None
+        # Portrayal of every cell (by flat cell index) and its gray bucket
+        self.cells = None
+        self.buckets = None
+
+    def render(self, model):
+        with model.profiler.phase("portrayal"):
+            buckets = getFieldRaster(model, self.block)
+            (width, height) = getBlockShape(model, self.block)
+
+            if model is not self.model or self.buckets is None or len(self.buckets) != len(buckets):
+                # New model, portray every cell
+                self.model = model
+                self.cells = [{"Shape": "rect", "w": 1, "h": 1, "Filled": "true", "Layer": 0,
+                               "x": x, "y": y, "Color": grayShades[buckets[x * height + y]]}
+                              for x in range(width) for y in range(height)]
+            else:
+                # Only cells whose gray bucket changed get a new color
+                for cell in np.flatnonzero(buckets != self.buckets):
+                    self.cells[cell]["Color"] = grayShades[buckets[cell]]
+            self.buckets = buckets
+
+            pop = model.population
+            shades = slimeShades.get(pop.color, slimeShades["Blue"])
+
+            if self.block == 1:
+                # DataVis and NumDataVis agents
+                agents = [cAMP_portrayal(vis) for vis in model.dataVis]
+
+                # SlimeAgents cell by cell, from the bottom to the top of every stack
+                order, starts = pop.getCellIndex(model.width, model.height)
+                agents += [{"Shape": "circle", "w": 1, "h": 1, "Filled": "true", "Layer": 1, "r": .65,
+                            "x": x, "y": y, "Color": shades[shade]}
+                           for (x, y, shade) in zip(pop.x[order].tolist(), pop.y[order].tolist(), pop.shade[order].tolist())]
+            else:
+                # One DataVis and NumDataVis pair for every row of blocks
+                agents = list()
+                for (x, y, color, text) in getDataVis(model, self.block):
+                    if text is None:
+                        agents.append({"Shape": "rect", "w": 1, "h": 1, "Filled": "true", "Layer": 1,
+                                       "x": x, "y": y, "Color": color})
+                    else:
+                        agents.append({"Shape": "rect", "w": 1.5, "h": 1, "Filled": "true", "Layer": 1,
+                                       "x": x, "y": y, "Color": color, "text": text, "text_color": "#000000"})
+
+                # One agent on every occupied block
+                raster = getAgentRaster(model, self.block)
+                agents += [{"Shape": "circle", "w": 1, "h": 1, "Filled": "true", "Layer": 1, "r": .65,
+                            "x": int(cell // height), "y": int(cell % height), "Color": shades[raster[cell] - 1]}
+                           for cell in np.flatnonzero(raster)]
+
+            return {0: self.cells, 1: agents}
+
+# Create list of datacollectors
+xCollectors = list()
+yCollectors = list()
+
+# Loop to create bars for bar graphs
+coord = 0
+for x in range(gridWidth):
+    xCollectors.append({"Label": ("x: " + str(coord)), "Color": "#85c6e7"})
+    coord += 1
+
+coord = 0
+for y in range(gridHeight):
+    yCollectors.append({"Label": ("y: " + str(coord)), "Color": "#85c6e7"})
+    coord += 1
+
+# Create a bar charts to represent column and row amounts of relative to grid
+#bar_chart_element_col = BarChartModule(xCollectors, canvas_width = 550)
+#bar_chart_element_row = BarChartModule(yCollectors, canvas_width = 550)
+
+# Create a chart to represent total amount of cAMP on the grid (one point per model step)
+chart_element = StepChartModule([{"Label":"Total Amount of cAMP", "Color":"#85c6e7"}])
+
+# Setting size of model
+model_params = {
+        "height": gridHeight,
+        "width": gridWidth,
+        # The canvas draws from the model's arrays, so no cAMP or SlimeAgent views are placed on the grid
+        "views": False,
+        "dataVis": showDataVis,
+        "numAgents": UserSettableParameter("slider", "Number of Agents", 1, 1, 10, 1),
+        "gDense": UserSettableParameter("slider", "Density of Agents on Grid", .5, 0, 1, .1),
+        "kRate": UserSettableParameter("slider", "Rate of cAMP decay", 1, 0, 5, .5),
+        "dcDiffu": UserSettableParameter("slider", "Diffusion Constant of cAMP", .001, 0, .01, .001),
+        "dhRes": UserSettableParameter("slider", "Spatial Resolution for cAMP Simulation", .01, 0, .1, .01),
+        "dtRes": UserSettableParameter("slider", "Time Resolution for cAMP Simulation", .01, .01, .1, .01),
+        "secRate": UserSettableParameter("slider", "Rate of cAMP Secretion by an Agent", 1, 0, 15, 1),
+        "color": UserSettableParameter("choice", "Agent Color", value="Blue", choices=["Blue", "Red", "Green"])
+        }
+
+# Create grid for agents at most 550px x 550px, with square tiles (drawn from the model's arrays)
+dataVisColumns = 2 if showDataVis else 0
+viewWidth = -(-gridWidth // renderBlock) + dataVisColumns
+viewHeight = -(-gridHeight // renderBlock)
+canvasWidth = 550 * viewWidth // max(viewWidth, viewHeight)
+canvasHeight = 550 * viewHeight // max(viewWidth, viewHeight)
+if deltaFrames:
+    canvas_element = DeltaCanvasGrid(gridWidth, gridHeight, canvasWidth, canvasHeight, compress=compressFrames,
+                                     block=renderBlock, dataVisColumns=dataVisColumns)
+else:
+    canvas_element = FieldCanvasGrid(gridWidth, gridHeight, canvasWidth, canvasHeight, block=renderBlock,
+                                     dataVisColumns=dataVisColumns)
+
+
+# Creating ModularServer
+#server = ModularServer(SlimeModel, [canvas_element, bar_chart_element_col, bar_chart_element_row, chart_element], "Keller-Segel Slime Mold Aggregation Model", model_params)
+server = FrameServer(SlimeModel, [canvas_element, chart_element], "Keller-Segel Slime Mold Aggregation Model", model_params,
+                     stepsPerFrame=stepsPerFrame)
@@ -0,0 +1,127 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+'''
+    Helpers for NumPy arrays backed by multiprocessing shared memory, so
+        other processes can read and write them without copying.
+
+    A SlimeModel built with shared=True keeps its cAMP buffers, the number of
+        agents on every cell and a small state array (update counter, current
+        buffer, step) in shared memory. Another process attaches with the specs
+        from model.getSharedSpecs():
+
+        view = SharedModelView(specs)
+        step, field, occupancy = view.snapshot()
+'''
+
+# Names of the shared memory blocks created by this process (tracked by its own resource tracker)
+createdBlocks = set()
+
+# Create a shared memory block holding a copy of array, returns (block, shared array)
+def createShared(array):
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    createdBlocks.add(block.name)
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[...] = array
+
+    return block, shared
+
+# Attach to an existing shared memory block by name, returns (block, shared array)
+def attachShared(name, shape, dtype):
+    try:
+        block = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always tracks the block. Child processes share the tracker of the process that
+        # created it, any other process has its own, which must not unlink the block when it exits
+        # (the creating process keeps its registration, it unlinks the block itself)
+        block = shared_memory.SharedMemory(name=name)
+        if multiprocessing.parent_process() is None and name not in createdBlocks:
+            resource_tracker.unregister(block._name, "shared_memory")
+
+    return block, np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+# Named arrays moved into shared memory by one process
+class SharedArrays:
+    def __init__(self):
+        # Shared memory block of every array
+        self.blocks = dict()
+        # Shared array by name
+        self.arrays = dict()
+
+    # Copy array into a new shared memory block under name, returns the shared array
+    def share(self, name, array):
+        block, shared = createShared(array)
+        self.blocks[name] = block
+        self.arrays[name] = shared
+
+        return shared
+
+    # Get (block name, shape, dtype) of every array, enough for another process to attach
+    def getSpecs(self):
+        specs = dict()
+        for (name, array) in self.arrays.items():
+            specs[name] = (self.blocks[name].name, array.shape, array.dtype.str)
+
+        return specs
+
+    # Release and remove every block (the arrays must no longer be used)
+    def close(self):
+        self.arrays = dict()
+        for block in self.blocks.values():
+            createdBlocks.discard(block.name)
+            block.close()
+            block.unlink()
+        self.blocks = dict()
+
+
+# Read access to the live state of a SlimeModel built with shared=True, from any process
+class SharedModelView:
+    def __init__(self, specs):
+        self.blocks = list()
+        self.arrays = dict()
+        for (name, (blockName, shape, dtype)) in specs.items():
+            block, self.arrays[name] = attachShared(blockName, tuple(shape), dtype)
+            self.blocks.append(block)
+
+    # Get update counter (odd while the model is in the middle of a step)
+    def getSequence(self):
+        return int(self.arrays["state"][0])
+
+    # Get step number of the published state
+    def getStep(self):
+        return int(self.arrays["state"][2])
+
+    # Get the current cAMP field (no copy, only valid until the model finishes its next step)
+    def getField(self):
+        return self.arrays["field" + str(self.arrays["state"][1])]
+
+    # Get the number of agents on every cell (no copy)
+    def getOccupancy(self):
+        return self.arrays["occupancy"]
+
+    # Get a consistent copy of (step, field, occupancy), retrying while the model is stepping (waiting a little
+    #   longer after every failed try, up to maxWait seconds)
+    def snapshot(self, maxWait=.01):
+        wait = 1e-5
+        while True:
+            sequence = self.getSequence()
+            if sequence % 2 == 0:
+                step = self.getStep()
+                field = self.getField().copy()
+                occupancy = self.getOccupancy().copy()
+                if self.getSequence() == sequence:
+                    return step, field, occupancy
+
+            time.sleep(wait)
+            wait = min(wait * 2, maxWait)
+
+    # Detach from the shared memory blocks
+    def close(self):
+        self.arrays = dict()
+        for block in self.blocks:
+            block.close()
+        self.blocks = list()
@@ -0,0 +1,101 @@
+import argparse
+import itertools
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from batch import defaultParams, runModel
+
+'''
+    Parameter sweep: runs every combination of a parameter grid a number of
+        times (replicates) on a pool of worker processes, each run with its
+        own seed, and gathers the collected data of all runs into one table.
+        kRate and secRate cannot be swept: SlimeModel takes them but keeps a
+        fixed decay rate (0.1) and secretion rate (5).
+
+    Example:
+        python sweep.py --steps 500 --replicates 3 --numAgents 1 2 --gDense .3 .5 --out sweep.csv
+'''
+
+# Parameters SlimeModel takes but ignores, so sweeping them would repeat the same runs
+ignoredParams = ("kRate", "secRate")
+
+# Build one task (run id, replicate, seed, params) for every combination and replicate
+def buildTasks(paramGrid, replicates, seed=0):
+    names = list(paramGrid.keys())
+    combinations = list(itertools.product(*[paramGrid[name] for name in names]))
+
+    # Independent seed for every run
+    seeds = np.random.SeedSequence(seed).generate_state(len(combinations) * replicates)
+
+    tasks = list()
+    for (i, values) in enumerate(combinations):
+        for replicate in range(replicates):
+            run = i * replicates + replicate
+            tasks.append((run, replicate, int(seeds[run]), dict(zip(names, values))))
+
+    return tasks
+
+# Run a single task of the sweep and return its collected data as a table
+def runTask(task, steps, profiles=False, compiled=False):
+    (run, replicate, seed, params) = task
+    model = runModel(steps, seed=seed, compiled=compiled, **params)
+
+    data = model.datacollector.get_model_vars_dataframe()
+    if not profiles:
+        data = data[["Total Amount of cAMP", "Number of Clusters"]]
+
+    data.insert(0, "Step", model.datacollector.getSteps())
+    data.insert(0, "Seed", seed)
+    data.insert(0, "Replicate", replicate)
+    data.insert(0, "Run", run)
+    for (name, value) in params.items():
+        data[name] = value
+
+    return data
+
+# Helper so pool workers can call runTask with a single argument
+def runTaskArgs(args):
+    return runTask(*args)
+
+# Run every combination of paramGrid (name -> list of values) replicates times on a process pool
+def runSweep(paramGrid, replicates=1, steps=100, processes=None, seed=0, profiles=False, compiled=False):
+    for name in ignoredParams:
+        if len(paramGrid.get(name, ())) > 1:
+            raise ValueError(name + " cannot be swept, the model ignores it")
+
+    tasks = buildTasks(paramGrid, replicates, seed)
+
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(runTaskArgs, [(task, steps, profiles, compiled) for task in tasks])
+
+    return pd.concat(results, ignore_index=True)
+
+# Parse command line arguments (one list option per model parameter)
+def parseArgs(args=None):
+    parser = argparse.ArgumentParser(description="Sweep parameters of the Keller-Segel Slime Mold Aggregation Model")
+    parser.add_argument("--steps", type=int, default=100, help="number of steps of every run")
+    parser.add_argument("--replicates", type=int, default=1, help="number of runs of every combination")
+    parser.add_argument("--processes", type=int, default=None, help="number of worker processes (default: all CPUs)")
+    parser.add_argument("--seed", type=int, default=0, help="seed the per-run seeds are derived from")
+    parser.add_argument("--profiles", action="store_true", help="include the row and column profiles")
+    parser.add_argument("--compiled", action="store_true", help="use the Numba kernels (if installed)")
+    parser.add_argument("--out", default="sweep.csv", help="output table (.csv)")
+    for (name, value) in defaultParams.items():
+        parser.add_argument("--" + name, type=type(value), nargs="+", default=[value])
+
+    args = parser.parse_args(args)
+    for name in ignoredParams:
+        if len(getattr(args, name)) > 1:
+            parser.error("--" + name + " cannot be swept, the model ignores it (fixed decay rate 0.1, secretion rate 5)")
+
+    return args
+
+
+if __name__ == "__main__":
+    args = vars(parseArgs())
+    options = {name: args.pop(name) for name in ["steps", "replicates", "processes", "seed", "profiles", "compiled"]}
+    outPath = args.pop("out")
+
+    runSweep(args, **options).to_csv(outPath, index=False)
@@ -0,0 +1,129 @@
+import json
+import os
+
+import numpy as np
+
+'''
+    Memory-mapped store for the full history of a run. Every recorded step
+        appends the cAMP field and the number of agents on every cell to raw
+        binary files in a directory, mapped into memory with np.memmap and
+        grown by a fixed number of steps (chunk) at a time, so histories far
+        larger than memory can be written and replayed.
+
+    Directory layout:
+        meta.json       width, height, dtypes, chunk and number of steps
+        steps.dat       step number of every record (int64)
+        field.dat       cAMP field of every record (steps x width x height)
+        occupancy.dat   agents on every cell of every record (steps x width x height)
+'''
+
+class TrajectoryStore:
+    def __init__(self, path, width=None, height=None, chunk=256, fieldDtype="float64", mode="w"):
+        # Directory of the store
+        self.path = path
+        # Whether the store is created for writing ("w"), reopened for appending ("a") or read ("r")
+        self.mode = mode
+
+        if mode == "w":
+            os.makedirs(path, exist_ok=True)
+            self.meta = {"width": width, "height": height, "chunk": chunk, "count": 0,
+                         "fieldDtype": np.dtype(fieldDtype).str, "occupancyDtype": np.dtype(np.int32).str}
+            # Number of records the files have room for
+            self.capacity = 0
+            for name in ("steps", "field", "occupancy"):
+                open(self.getFile(name), "wb").close()
+            self.grow()
+        else:
+            with open(os.path.join(path, "meta.json")) as file:
+                self.meta = json.load(file)
+            if mode == "a":
+                self.capacity = os.path.getsize(self.getFile("steps")) // np.dtype(np.int64).itemsize
+                self.mapFiles("r+")
+            else:
+                self.capacity = self.meta["count"]
+                self.mapFiles("r")
+
+    # Get path of the data file of name
+    def getFile(self, name):
+        return os.path.join(self.path, name + ".dat")
+
+    # Map the data files into memory for capacity records
+    def mapFiles(self, mode):
+        shape = (self.capacity, self.meta["width"], self.meta["height"])
+        if self.capacity == 0:
+            self.steps = np.zeros(0, dtype=np.int64)
+            self.field = np.zeros(shape, dtype=self.meta["fieldDtype"])
+            self.occupancy = np.zeros(shape, dtype=self.meta["occupancyDtype"])
+            return
+
+        self.steps = np.memmap(self.getFile("steps"), dtype=np.int64, mode=mode, shape=(self.capacity,))
+        self.field = np.memmap(self.getFile("field"), dtype=self.meta["fieldDtype"], mode=mode, shape=shape)
+        self.occupancy = np.memmap(self.getFile("occupancy"), dtype=self.meta["occupancyDtype"], mode=mode, shape=shape)
+
+    # Extend the data files by one chunk of records
+    def grow(self):
+        if self.capacity > 0:
+            self.flush()
+
+        self.capacity += self.meta["chunk"]
+        cells = self.meta["width"] * self.meta["height"]
+        sizes = {"steps": np.dtype(np.int64).itemsize,
+                 "field": cells * np.dtype(self.meta["fieldDtype"]).itemsize,
+                 "occupancy": cells * np.dtype(self.meta["occupancyDtype"]).itemsize}
+        for (name, size) in sizes.items():
+            with open(self.getFile(name), "r+b") as file:
+                file.truncate(self.capacity * size)
+
+        self.mapFiles("r+")
+
+    # Append the field and occupancy of a step
+    def append(self, step, field, occupancy):
+        count = self.meta["count"]
+        if count == self.capacity:
+            self.grow()
+
+        self.steps[count] = step
+        self.field[count] = field
+        self.occupancy[count] = occupancy
+        self.meta["count"] = count + 1
+
+    # Drop every record after step (used when a run is resumed from a checkpoint)
+    def truncate(self, step):
+        self.meta["count"] = int(np.searchsorted(self.getSteps(), step, side="right"))
+
+    # Get number of recorded steps
+    def getCount(self):
+        return self.meta["count"]
+
+    # Get step numbers of the records
+    def getSteps(self):
+        return self.steps[:self.getCount()]
+
+    # Get cAMP fields of the records (memory-mapped, records x width x height)
+    def getFields(self):
+        return self.field[:self.getCount()]
+
+    # Get agents on every cell of the records (memory-mapped, records x width x height)
+    def getOccupancy(self):
+        return self.occupancy[:self.getCount()]
+
+    # Write mapped data and metadata to disk
+    def flush(self):
+        if self.mode == "r":
+            return
+
+        for array in (self.steps, self.field, self.occupancy):
+            if isinstance(array, np.memmap):
+                array.flush()
+        with open(os.path.join(self.path, "meta.json"), "w") as file:
+            json.dump(self.meta, file)
+
+    # Flush and unmap the data files
+    def close(self):
+        self.flush()
+        self.steps = self.field = self.occupancy = None
+
+
+# Open a recorded trajectory for reading
+def openTrajectory(path):
+    return TrajectoryStore(path, mode="r")